@@ -0,0 +1,650 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:05:47 2026.
+
+Streaming input of the blood gases files.
+
+- column normalization and reference filling (as bgmain_manual.csv_to_df)
+- chunked csv reader (iter_chunks, iter_arrays, read_columns)
+- parsed-file cache (ParsedCache, use_parse_cache, parse_cached)
+- time alignment of the monitor trends (align_trend)
+
+@author: cdesbois
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import functools
+import importlib.util
+import warnings
+from typing import Any, Callable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+import bgplot
+
+# the columns of a gas file
+KEY_LIST = ["spec", "hb", "fio2", "po2", "ph", "pco2", "hco3", "etco2"]
+
+# renamed columns
+CORR_TITLE = {"thb": "hb"}
+
+# the declared dtypes of the gas columns (float: cf float_dtype)
+# shared by the readers (csv_to_df, iter_chunks, trainingData.load_data)
+COLUMN_DTYPES: dict[str, Any] = {
+    "spec": "category",
+    "hb": float,
+    "fio2": float,
+    "po2": float,
+    "ph": float,
+    "pco2": float,
+    "hco3": float,
+    "etco2": float,
+}
+
+
+def normalize_columns(columns: Any) -> list[str]:
+    """Return the lower case columns names, without '+' and '-' ('thb' -> 'hb')."""
+    cols = [str(col).lower().replace("+", "").replace("-", "") for col in columns]
+    return [CORR_TITLE.get(col, col) for col in cols]
+
+
+def missing_columns(columns: Any) -> list[str]:
+    """Return the KEY_LIST columns that are not in columns."""
+    return [item for item in KEY_LIST if item not in list(columns)]
+
+
+def declared_dtypes(header: Any, float_dtype: Any = np.float64) -> dict[str, Any]:
+    """
+    Return the read_csv dtypes of the gas columns of a file header.
+
+    Parameters
+    ----------
+    header : list like
+        the columns names of the file (before normalize_columns).
+    float_dtype : numpy dtype, optional (default is np.float64)
+        dtype of the numerical columns.
+
+    Returns
+    -------
+    dict[str, Any]
+        {file column: dtype} (cf COLUMN_DTYPES).
+    """
+    dtypes = {}
+    for col, name in zip(header, normalize_columns(header)):
+        if name in COLUMN_DTYPES:
+            dtype = COLUMN_DTYPES[name]
+            dtypes[col] = float_dtype if dtype is float else dtype
+    return dtypes
+
+
+def fill_reference(df: pd.DataFrame, verbose: bool = True) -> pd.DataFrame:
+    """
+    Replace the NaN by the reference values (cf bgplot.GasBatch.defaults).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        the normalized data (modified in place).
+    verbose : bool, optional (default is True)
+        print the filled columns.
+
+    Returns
+    -------
+    pd.DataFrame
+        the filled data.
+    """
+    ref = bgplot.GasBatch.defaults
+    for col in df.columns:
+        if col in ref:
+            if df[col].hasnans:
+                if verbose:
+                    print("there are missing values in ", col)
+                    print("they will be replaced by ", ref[col])
+                logging.info(f"{df[col].isna().sum()} missing {col} values filled")
+                values = df[col]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    if ref[col] not in values.cat.categories:
+                        values = values.cat.add_categories([ref[col]])
+                df[col] = values.fillna(ref.get(col))
+    return df
+
+
+def iter_chunks(
+    filename: str,
+    chunksize: int = 100_000,
+    sep: str = "\t",
+    decimal: str = ",",
+    float_dtype: Any = np.float64,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a gas csv file by chunks (normalized, validated and filled).
+
+    Parameters
+    ----------
+    filename : str
+        the csv file (one line per gas, cf KEY_LIST for the columns).
+    chunksize : int, optional (default is 100_000)
+        number of lines per chunk (bounds the memory).
+    sep : str, optional (default is tab)
+        the delimiter.
+    decimal : str, optional (default is ",")
+        the decimal separator.
+    float_dtype : numpy dtype, optional (default is np.float64)
+        dtype of the KEY_LIST numerical columns.
+
+    Yields
+    ------
+    pd.DataFrame
+        the chunks (same normalization and dtypes as bgmain_manual.csv_to_df:
+        'spec' category, the other KEY_LIST columns float_dtype).
+
+    Raises
+    ------
+    ValueError
+        if a KEY_LIST column is missing.
+    """
+    header = pd.read_csv(filename, sep=sep, nrows=0).columns
+    names = normalize_columns(header)
+    missing = missing_columns(names)
+    if missing:
+        raise ValueError(f"{filename}: {missing} missing in the file")
+    reader = pd.read_csv(
+        filename,
+        sep=sep,
+        decimal=decimal,
+        dtype=declared_dtypes(header, float_dtype),
+        chunksize=chunksize,
+        float_precision="round_trip",
+    )
+    with reader:
+        for chunk in reader:
+            chunk.columns = names
+            yield fill_reference(chunk, verbose=False)
+
+
+def iter_arrays(
+    filename: str,
+    columns: Optional[list[str]] = None,
+    chunksize: int = 100_000,
+    float_dtype: Any = np.float64,
+    **kwargs: Any,
+) -> Iterator[dict[str, np.ndarray]]:
+    """
+    Read a gas csv file by chunks of numpy column arrays.
+
+    Parameters
+    ----------
+    filename : str
+        the csv file.
+    columns : list[str], optional (default is None)
+        the columns to keep (default KEY_LIST), 'spec' gives the 'spec_code'
+        int8 array (cf bgplot.GasBatch.encode_species).
+    chunksize : int, optional (default is 100_000)
+        number of lines per chunk.
+    float_dtype : numpy dtype, optional (default is np.float64)
+        dtype of the numerical arrays.
+    **kwargs :
+        other iter_chunks parameters (sep, decimal).
+
+    Yields
+    ------
+    dict[str, np.ndarray]
+        {column: array} for each chunk.
+    """
+    if columns is None:
+        columns = KEY_LIST
+    for chunk in iter_chunks(filename, chunksize, float_dtype=float_dtype, **kwargs):
+        arrays = {}
+        for col in columns:
+            if col == "spec":
+                # encode the categories only
+                spec = chunk["spec"].cat
+                codes = bgplot.GasBatch.encode_species(spec.categories.to_numpy(str))
+                arrays["spec_code"] = codes[spec.codes].astype(np.int8)
+            else:
+                arrays[col] = chunk[col].to_numpy(dtype=float_dtype)
+        yield arrays
+
+
+def read_columns(
+    filename: str,
+    columns: Optional[list[str]] = None,
+    chunksize: int = 100_000,
+    float_dtype: Any = np.float64,
+    **kwargs: Any,
+) -> dict[str, np.ndarray]:
+    """
+    Read the columns of a gas csv file as numpy arrays (cf iter_arrays).
+
+    Only the selected columns are kept in memory (never the full file).
+
+    Parameters
+    ----------
+    filename : str
+        the csv file.
+    columns : list[str], optional (default is None)
+        the columns to keep (default KEY_LIST).
+    chunksize : int, optional (default is 100_000)
+        number of lines per chunk.
+    float_dtype : numpy dtype, optional (default is np.float64)
+        dtype of the numerical arrays.
+    **kwargs :
+        other iter_chunks parameters (sep, decimal).
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        {column: array} ('spec_code' for 'spec').
+    """
+    parts: dict[str, list[np.ndarray]] = {}
+    for arrays in iter_arrays(filename, columns, chunksize, float_dtype, **kwargs):
+        for col, arr in arrays.items():
+            parts.setdefault(col, []).append(arr)
+    return {col: np.concatenate(arrs) for col, arrs in parts.items()}
+
+
+# --------------------------------------
+# parsed-file cache
+
+# bump when the loaders change (invalidate the cached frames)
+# 2: the frames attrs are cached
+PARSE_VERSION = 2
+
+
+def file_digest(filename: str, blocksize: int = 2**20) -> str:
+    """Return the sha256 hexdigest of a file content."""
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(blocksize), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParsedCache:
+    """
+    Cache of the parsed files (the normalized DataFrames of the loaders).
+
+    + ParsedCache(directory='~/.cache/bloodGasesPlot/parsed', fmt=None)
+
+    + attributes :
+        directory : the cache location \
+        fmt : 'feather' (if pyarrow is installed) or 'npy' \
+    + methods :
+        key : return the cache key of a source file and a loader \
+        get : return the cached DataFrame of a key (memory mapped) \
+        put : store a DataFrame \
+        load : return the cached DataFrame or parse (and store) the source \
+        clear : remove all the cached frames \
+        stats : return the counters (hits, misses, stores, hashed) \
+
+    The key is a hash of (path, size, content hash, loader, parameters,
+    PARSE_VERSION), the content hash is recomputed only if the size or the
+    mtime of the source changed (index.json). The previous entry of a modified
+    source is removed.
+    The DataFrame attrs are stored in the metadata and restored on load.
+    'npy' stores one .npy per column, reloaded as copy on write memory maps
+    (mmap_mode='c': the frame is writable, the cache is never modified).
+    """
+
+    def __init__(self, directory: Optional[str] = None, fmt: Optional[str] = None):
+        if directory is None:
+            directory = os.path.join("~", ".cache", "bloodGasesPlot", "parsed")
+        self.directory = os.path.expanduser(directory)
+        if fmt is None:
+            fmt = "feather" if importlib.util.find_spec("pyarrow") else "npy"
+        self.fmt = fmt
+        self._counters = dict.fromkeys(["hits", "misses", "stores", "hashed"], 0)
+
+    # index: source path -> stat, content hash, keys
+    def _read_index(self) -> dict[str, Any]:
+        path = os.path.join(self.directory, "index.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+
+    def _write_index(self, index: dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "index.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(index, file, indent=1)
+        os.replace(tmp, path)
+
+    def key(self, filename: str, loader: str, **params: Any) -> str:
+        """
+        Return the cache key of a source file parsed by a loader.
+
+        Parameters
+        ----------
+        filename : str
+            the source file.
+        loader : str
+            the loader name.
+        **params :
+            the loader parameters.
+
+        Returns
+        -------
+        str
+            sha256 hexdigest.
+        """
+        path = os.path.abspath(os.path.expanduser(filename))
+        stat = os.stat(path)
+        index = self._read_index()
+        entry = index.get(path, {})
+        if entry.get("size") != stat.st_size or entry.get("mtime") != stat.st_mtime_ns:
+            # new or modified source
+            digest = file_digest(path)
+            self._counters["hashed"] += 1
+            if entry.get("digest") != digest:
+                for old in entry.get("keys", []):
+                    shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+                entry = {"digest": digest, "keys": []}
+            entry.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+            index[path] = entry
+            self._write_index(index)
+        content = {
+            "path": path,
+            "size": stat.st_size,
+            "digest": entry["digest"],
+            "loader": loader,
+            "params": {name: repr(val) for name, val in sorted(params.items())},
+            "versions": [PARSE_VERSION, pd.__version__, np.__version__, self.fmt],
+        }
+        key = hashlib.sha256(json.dumps(content).encode()).hexdigest()
+        if key not in entry["keys"]:
+            entry["keys"].append(key)
+            self._write_index(index)
+        return key
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Return the cached DataFrame of a key (None if not cached)."""
+        folder = os.path.join(self.directory, key)
+        meta_path = os.path.join(folder, "meta.json")
+        if not os.path.exists(meta_path):
+            self._counters["misses"] += 1
+            return None
+        with open(meta_path, encoding="utf-8") as file:
+            meta = json.load(file)
+        if meta["fmt"] == "feather":
+            df = pd.read_feather(os.path.join(folder, "frame.feather"), memory_map=True)
+            df = df.set_index(meta["index"]) if meta["index"] else df
+        else:
+            df = self._read_npy(folder, meta)
+        if meta["index"]:
+            df.index.names = meta["index_names"]
+        # as returned by the loader (eg load_data parse_time)
+        df.attrs.update(meta.get("attrs", {}))
+        self._counters["hits"] += 1
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Store a DataFrame."""
+        folder = os.path.join(self.directory, key)
+        tmp = f"{folder}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        meta: dict[str, Any] = {"fmt": self.fmt, "index": [], "index_names": []}
+        meta["attrs"] = dict(df.attrs)
+        if not isinstance(df.index, pd.RangeIndex):
+            meta["index_names"] = list(df.index.names)
+            meta["index"] = [f"__index_{i}" for i in range(df.index.nlevels)]
+            df = df.copy(deep=False)
+            df.index.names = meta["index"]
+            df = df.reset_index()
+        if self.fmt == "feather":
+            df.to_feather(os.path.join(tmp, "frame.feather"))
+        else:
+            meta.update(self._write_npy(tmp, df))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as file:
+            # (the attrs values that json can't store are kept as repr)
+            json.dump(meta, file, default=repr)
+        # atomic (concurrent sessions)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.replace(tmp, folder)
+        self._counters["stores"] += 1
+
+    @staticmethod
+    def _write_npy(folder: str, df: pd.DataFrame) -> dict[str, Any]:
+        """Write one .npy per column, return the columns description."""
+        columns = []
+        for i, col in enumerate(df.columns):
+            values = df[col]
+            desc: dict[str, Any] = {"name": col, "file": f"c{i}.npy"}
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                desc.update(kind="category", categories=values.cat.categories.tolist())
+                arr = values.cat.codes.to_numpy()
+            elif values.dtype.kind in "biufcmM":
+                desc.update(kind="numpy")
+                arr = values.to_numpy()
+            else:
+                texts = values.map(lambda x: x if isinstance(x, str) else None)
+                codes, uniques = pd.factorize(values)
+                if not texts.isna().equals(values.isna()):
+                    # mixed objects (not memory mapped)
+                    desc.update(kind="object")
+                    arr = values.to_numpy(dtype=object)
+                elif len(uniques) <= len(values) // 2:
+                    # repeated str: codes (-1 = missing) + uniques
+                    desc.update(kind="factor", uniques=uniques.tolist())
+                    desc.update(dtype=str(values.dtype))
+                    arr = codes
+                else:
+                    # str (and missing values): fixed width unicode + mask
+                    desc.update(kind="str", mask=f"m{i}.npy", dtype=str(values.dtype))
+                    np.save(
+                        os.path.join(folder, desc["mask"]), values.isna().to_numpy()
+                    )
+                    arr = values.fillna("").to_numpy(dtype=str)
+            np.save(os.path.join(folder, desc["file"]), arr, allow_pickle=True)
+            columns.append(desc)
+        return {"columns": columns}
+
+    @staticmethod
+    def _read_npy(folder: str, meta: dict[str, Any]) -> pd.DataFrame:
+        """Return the DataFrame of the .npy columns (memory mapped)."""
+        data = {}
+        for desc in meta["columns"]:
+            path = os.path.join(folder, desc["file"])
+            if desc["kind"] == "object":
+                data[desc["name"]] = np.load(path, allow_pickle=True)
+                continue
+            arr = np.load(path, mmap_mode="c")
+            if desc["kind"] == "category":
+                data[desc["name"]] = pd.Categorical.from_codes(
+                    arr, categories=desc["categories"]
+                )
+            elif desc["kind"] == "factor":
+                factor = pd.Categorical.from_codes(arr, categories=desc["uniques"])
+                data[desc["name"]] = pd.Series(factor).astype(desc["dtype"])
+            elif desc["kind"] == "str":
+                mask = np.load(os.path.join(folder, desc["mask"]))
+                values = pd.Series(arr, dtype=desc["dtype"])
+                data[desc["name"]] = values.mask(mask)
+            else:
+                data[desc["name"]] = arr
+        df = pd.DataFrame(data, copy=False)
+        if meta["index"]:
+            df = df.set_index(meta["index"])
+        return df
+
+    def load(
+        self, filename: str, loader: Callable, *args: Any, **params: Any
+    ) -> pd.DataFrame:
+        """
+        Return the parsed source (from the cache, or parsed and stored).
+
+        Parameters
+        ----------
+        filename : str
+            the source file.
+        loader : Callable
+            loader(filename, *args, **params) -> pd.DataFrame
+        *args, **params :
+            the loader parameters.
+
+        Returns
+        -------
+        pd.DataFrame
+            the parsed data.
+        """
+        start = time.perf_counter()
+        name = f"{loader.__module__}.{loader.__qualname__}"
+        key = self.key(filename, name, args=args, **params)
+        df = self.get(key)
+        if df is not None:
+            logging.info(
+                f"{filename} served from the parse cache"
+                f" in {time.perf_counter() - start:.3f}s"
+            )
+            return df
+        df = loader(filename, *args, **params)
+        if len(df.columns):
+            # (an empty frame is a failed load)
+            self.put(key, df)
+        return df
+
+    def clear(self) -> None:
+        """Remove all the cached frames."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def stats(self) -> dict[str, int]:
+        """Return the counters."""
+        return dict(self._counters)
+
+
+PARSE_CACHE: Optional[ParsedCache] = None
+
+
+def use_parse_cache(enable: bool = True, **kwargs: Any) -> Optional[ParsedCache]:
+    """
+    Enable (or disable) the parsed-file cache of the loaders (cf parse_cached).
+
+    Parameters
+    ----------
+    enable : bool, optional (default is True)
+        True to use the cache.
+    **kwargs :
+        ParsedCache parameters (directory, fmt).
+
+    Returns
+    -------
+    Optional[ParsedCache]
+        the cache (None if disabled).
+    """
+    global PARSE_CACHE
+    PARSE_CACHE = ParsedCache(**kwargs) if enable else None
+    logging.info(f"{PARSE_CACHE=}")
+    return PARSE_CACHE
+
+
+def get_parse_cache() -> Optional[ParsedCache]:
+    """Return the enabled parsed-file cache (None if disabled)."""
+    return PARSE_CACHE
+
+
+def parse_cached(loader: Callable) -> Callable:
+    """Serve a loader(filename, ...) from the parsed-file cache if enabled."""
+
+    @functools.wraps(loader)
+    def wrapper(filename: Any = None, *args: Any, **params: Any) -> pd.DataFrame:
+        cache = get_parse_cache()
+        if cache is None or filename is None:
+            return loader(filename, *args, **params)
+        return cache.load(filename, loader, *args, **params)
+
+    return wrapper
+
+
+# --------------------------------------
+# time alignment of the monitor trends
+
+# the window aggregators (NaN are ignored, cf align_trend)
+AGGREGATORS: dict[str, Callable] = {
+    "median": np.nanmedian,
+    "mean": np.nanmean,
+    "min": np.nanmin,
+    "max": np.nanmax,
+}
+
+
+def align_trend(
+    times: Any,
+    trend: pd.DataFrame,
+    window: Any = pd.Timedelta(minutes=3),
+    agg: Any = "median",
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Aggregate the trend samples around each time (vectorized).
+
+    The windows [time - window, time + window] (bounds included) are located
+    by binary search in the sorted trend index, and aggregated in one pass
+    over a NaN padded (times, samples, columns) array.
+
+    Parameters
+    ----------
+    times : array like of datetime
+        the times to align (ie the blood gases times).
+    trend : pd.DataFrame
+        the monitor trend (datetime index, numerical columns).
+    window : timedelta, optional (default is 3 minutes)
+        the half width of the window.
+    agg : str or Callable, optional (default is "median")
+        'median', 'mean', 'min', 'max' (NaN ignored), 'nearest' (the nearest
+        sample inside the window), or a reduction func(array, axis=1) applied
+        to the NaN padded windows.
+
+    Returns
+    -------
+    values : pd.DataFrame
+        the aggregated values (index = times, NaN if no sample).
+    counts : np.ndarray
+        the number of trend samples matched for each time.
+    """
+    times = pd.DatetimeIndex(times)
+    window = pd.Timedelta(window)
+    # same resolution for the keys (ie csv 'us' and date_range 'ns')
+    keys = times.as_unit("ns")
+    trend = trend.set_axis(pd.DatetimeIndex(trend.index).as_unit("ns"))
+    if not trend.index.is_monotonic_increasing:
+        trend = trend.sort_index(kind="stable")
+    if agg == "nearest":
+        # merge_asof needs sorted keys (the times order is restored)
+        order = np.argsort(keys.to_numpy(), kind="stable")
+        left = pd.DataFrame({"time": keys.to_numpy()[order]})
+        right = trend.rename_axis("time").reset_index()
+        right["_matched"] = 1
+        merged = pd.merge_asof(
+            left, right, on="time", direction="nearest", tolerance=window
+        )
+        merged = merged.iloc[np.argsort(order)]
+        counts = merged.pop("_matched").fillna(0).to_numpy(dtype=int)
+        values = merged.drop(columns="time").set_index(times)
+        return values, counts
+    func = AGGREGATORS[agg] if isinstance(agg, str) else agg
+    stamps = trend.index.to_numpy()
+    low = np.searchsorted(stamps, (keys - window).to_numpy(), side="left")
+    high = np.searchsorted(stamps, (keys + window).to_numpy(), side="right")
+    counts = high - low
+    width = max(int(counts.max(initial=0)), 1)
+    offsets = low[:, np.newaxis] + np.arange(width)
+    inside = np.arange(width) < counts[:, np.newaxis]
+    data = trend.to_numpy(dtype=float)
+    if len(data) == 0:
+        data = np.full((1, trend.shape[1]), np.nan)
+    windows = data[np.where(inside, offsets, 0)]
+    windows[~inside] = np.nan
+    with warnings.catch_warnings():
+        # empty windows give NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        result = func(windows, axis=1)
+    values = pd.DataFrame(result, index=times, columns=trend.columns)
+    return values, counts
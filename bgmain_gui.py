@@ -9,14 +9,22 @@ a pyQt module to plot arterial blood gases
 """
 import os
 import sys
+import time
 import copy
 import logging
-from typing import Any
+import timeit
+import threading
+import zlib
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Optional
 
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from PyQt5.QtCore import pyqtSlot
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PyQt5.QtCore import pyqtSlot, pyqtSignal, QObject
+from PyQt5.QtGui import QImage, QPainter
 from PyQt5.QtWidgets import (
     QMainWindow,
     QApplication,
@@ -31,6 +39,7 @@ from PyQt5.QtWidgets import (
     QSizePolicy,
     QFileDialog,
     QTextEdit,
+    QProgressBar,
 )
 
 import bgplot
@@ -50,7 +59,7 @@ logging.basicConfig(
 gases, gasesV = [], {}
 g0 = bgplot.Gas(spec="horse")
 gases.append(g0)
-gasesV["g0"] = g0.__dict__
+gasesV["g0"] = g0.visu()
 
 # buildTestSet2(reset=True, addNewG=False)
 
@@ -62,6 +71,9 @@ class SelectGas(QWidget):
     NB add them in the bloodGases list ('gases') and dictionary ('gasesV').
     """
 
+    # emitted with the gas number when the selected gas changes
+    gasChanged = pyqtSignal(int)
+
     #    def __init__(self): #, gases, gasesV):
     def __init__(self) -> None:
         # print('SelectGas init')
@@ -239,6 +251,7 @@ class SelectGas(QWidget):
             # print('change_gas(', num, ')')
             self.selfObj_to_self(num)
             self.self_to_table()
+            self.gasChanged.emit(num)
         #            self.print_gas('after previous gas')
         else:
             QMessageBox.information(self, "str", " this is already the first gas")
@@ -258,6 +271,7 @@ class SelectGas(QWidget):
             # print('change_gas(', num, ')')
             self.selfObj_to_self(num)
             self.self_to_table()
+            self.gasChanged.emit(num)
             # print('self values after')
 
     @pyqtSlot()
@@ -293,9 +307,9 @@ class SelectGas(QWidget):
         #                   self.ph, self.pco2, self.hco3, self.etco2)
         self.gases.append(newBgObj)
 
-        # add to the gasesV dicionary (of gasObj__dict__)
+        # add to the gasesV dicionary (of read-only views of the gases)
         name = "g" + str(self.num)
-        self.gasesV[name] = newBgObj.__dict__
+        self.gasesV[name] = newBgObj.visu()
 
         res = (
             "added gas="
@@ -330,6 +344,7 @@ class SelectGas(QWidget):
 
         # update table values displayed
         self.self_to_table()
+        self.gasChanged.emit(self.num)
         # self.print_gas('newGas after update_Table')
 
         # print('newGas= ', self.num, 'over a total of ', len(gases))
@@ -483,6 +498,8 @@ class Qt5MplCanvas(FigureCanvas):
         # print('f=Qt5MplCanvas init')
         # plot definition
         self.fig = fig
+        # pre-rendered image (cf blit_image)
+        self.image: Optional[QImage] = None
         # initialization of the canvas
         FigureCanvas.__init__(self, self.fig)
         # set the parent widget
@@ -495,18 +512,272 @@ class Qt5MplCanvas(FigureCanvas):
         # notify the system of updated policy
         FigureCanvas.updateGeometry(self)
 
-    def redraw(self, fig: plt.Figure) -> None:
-        """Redraw the canvas."""
-        # print('f = redraw')
-        self.fig = fig
-        FigureCanvas.__init__(self, self.fig)
-        FigureCanvas.setSizePolicy(self, QSizePolicy.Preferred, QSizePolicy.Preferred)
-        # self.setParent(parent)
-        # FigureCanvas.setSizePolicy(self,
-        #                            QSizePolicy.Expanding,
-        #                            QSizePolicy.Expanding)
-        # notify the system of updated policy
-        FigureCanvas.updateGeometry(self)
+    def blit_image(self, image: QImage) -> None:
+        """Show a pre-rendered image (no matplotlib work)."""
+        self.image = image
+        self.update()
+
+    def paintEvent(self, event: Any) -> None:
+        """Paint the pre-rendered image if any, else the figure."""
+        if self.image is None:
+            super().paintEvent(event)
+            return
+        painter = QPainter(self)
+        painter.drawImage(self.rect(), self.image)
+        painter.end()
+
+
+def render_image(job: Callable[[], Figure], width: int, height: int) -> QImage:
+    """
+    Build a figure and render it with Agg (no pyplot, no widget).
+
+    Parameters
+    ----------
+    job : Callable[[], Figure]
+        function returning a matplotlib.Figure.
+    width, height : int
+        size of the image (pixels).
+
+    Returns
+    -------
+    QImage
+        the rendered image.
+    """
+    fig = job()
+    fig.set_size_inches(width / fig.dpi, height / fig.dpi)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    buf = canvas.buffer_rgba()
+    rows, cols = buf.shape[:2]
+    return QImage(bytes(buf), cols, rows, 4 * cols, QImage.Format_RGBA8888).copy()
+
+
+class RenderScheduler(QObject):
+    """
+    Render the plots on a worker thread (Agg backend).
+
+    + RenderScheduler(parent=None)
+
+    + attributes :
+        generation : number of the current request \
+    + signals :
+        rendered(generation, index, QImage) : a plot is rendered \
+        progress(done, total) : number of rendered plots \
+    + methods :
+        submit : replace the pending plots (new request, cancel the previous) \
+        request : render again a plot of the current request \
+        focus : change the current plot (the nearest plots are rendered first) \
+        cancel : drop the pending plots \
+        stop : end the worker thread \
+
+    the worker always takes the pending plot nearest to the current one
+    (current, then next and previous, then the others).
+    NB a plot already in rendering is finished but its result is dropped.
+    """
+
+    rendered = pyqtSignal(int, int, object)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.generation = 0
+        self._jobs: dict[int, Callable[[], Figure]] = {}
+        self._current = 0
+        self._size = (800, 600)
+        self._done = 0
+        self._total = 0
+        self._stop = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="render", daemon=True)
+        self._thread.start()
+
+    def request(self, index: int, job: Callable[[], Figure]) -> None:
+        """Render again a plot of the current request (ie evicted from a cache)."""
+        with self._cond:
+            if index not in self._jobs:
+                self._jobs[index] = job
+                self._total += 1
+                self._cond.notify()
+
+    def submit(
+        self, jobs: list[Callable[[], Figure]], current: int, size: tuple[int, int]
+    ) -> int:
+        """Render new plots (the previous request is cancelled)."""
+        with self._cond:
+            self.generation += 1
+            self._jobs = dict(enumerate(jobs))
+            self._current = current
+            self._size = size
+            self._done = 0
+            self._total = len(jobs)
+            self._cond.notify()
+            return self.generation
+
+    def focus(self, index: int) -> None:
+        """Change the current plot."""
+        with self._cond:
+            self._current = index
+
+    def cancel(self) -> None:
+        """Drop the pending plots."""
+        with self._cond:
+            self.generation += 1
+            self._jobs = {}
+
+    def stop(self) -> None:
+        """End the worker thread."""
+        with self._cond:
+            self._stop = True
+            self._jobs = {}
+            self._cond.notify()
+        self._thread.join(timeout=5)
+
+    def _next(self) -> tuple[int, int, Callable[[], Figure], tuple[int, int]]:
+        """Pop the pending plot nearest to the current one (lock held)."""
+        current = self._current
+        index = min(self._jobs, key=lambda i: (abs(i - current), i < current))
+        return self.generation, index, self._jobs.pop(index), self._size
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._jobs and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                generation, index, job, size = self._next()
+            try:
+                image = render_image(job, *size)
+            except Exception:
+                logging.exception(f"plot {index=} rendering failed")
+                image = None
+            with self._cond:
+                if generation != self.generation:
+                    # cancelled
+                    continue
+                self._done += 1
+                done, total = self._done, self._total
+            self.rendered.emit(generation, index, image)
+            self.progress.emit(done, total)
+
+
+class PlotCache:
+    """
+    Bounded (LRU) cache of the rendered plots.
+
+    + PlotCache(max_items=8, max_bytes=128 * 2**20, compress=True)
+
+    + attributes :
+        max_items, max_bytes : budget of the images kept as QImage \
+        compress : True keeps the evicted images as zlib compressed rasters,
+                False drops them (they are rendered again) \
+        max_compressed : budget (bytes) of the compressed rasters \
+    + methods :
+        put : add an image (evict the least recently used ones if needed) \
+        get : return an image (None if unknown, ie to render again) \
+        clear : empty the cache \
+        stats : return the counters (hits, restored, misses, evicted, dropped,
+                items, bytes, compressed_items, compressed_bytes) \
+    """
+
+    def __init__(
+        self,
+        max_items: int = 8,
+        max_bytes: int = 128 * 2**20,
+        compress: bool = True,
+        max_compressed: int = 32 * 2**20,
+    ) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.max_compressed = max_compressed
+        self._images: OrderedDict[Any, QImage] = OrderedDict()
+        self._rasters: OrderedDict[Any, tuple[bytes, int, int, int, Any]] = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._compressed_bytes = 0
+        self._counters = dict.fromkeys(
+            ["hits", "restored", "misses", "evicted", "dropped"], 0
+        )
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._images or key in self._rasters
+
+    def __len__(self) -> int:
+        return len(self._images) + len(self._rasters)
+
+    def put(self, key: Any, image: QImage) -> None:
+        """Add an image."""
+        self._discard(key)
+        self._images[key] = image
+        self._bytes += image.sizeInBytes()
+        while len(self._images) > 1 and (
+            len(self._images) > self.max_items or self._bytes > self.max_bytes
+        ):
+            self._evict()
+
+    def get(self, key: Any) -> Optional[QImage]:
+        """Return an image (None if it has to be rendered again)."""
+        if key in self._images:
+            self._counters["hits"] += 1
+            self._images.move_to_end(key)
+            return self._images[key]
+        if key in self._rasters:
+            self._counters["restored"] += 1
+            data, width, height, line, fmt = self._rasters[key]
+            image = QImage(zlib.decompress(data), width, height, line, fmt).copy()
+            self.put(key, image)
+            return image
+        self._counters["misses"] += 1
+        return None
+
+    def clear(self) -> None:
+        """Empty the cache."""
+        self._images.clear()
+        self._rasters.clear()
+        self._bytes = 0
+        self._compressed_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the counters."""
+        stats = dict(self._counters)
+        stats.update(
+            items=len(self._images),
+            bytes=self._bytes,
+            compressed_items=len(self._rasters),
+            compressed_bytes=self._compressed_bytes,
+        )
+        return stats
+
+    def _discard(self, key: Any) -> None:
+        if key in self._images:
+            self._bytes -= self._images.pop(key).sizeInBytes()
+        if key in self._rasters:
+            self._compressed_bytes -= len(self._rasters.pop(key)[0])
+
+    def _evict(self) -> None:
+        """Evict the least recently used image (compress it or drop it)."""
+        key, image = self._images.popitem(last=False)
+        self._bytes -= image.sizeInBytes()
+        self._counters["evicted"] += 1
+        if not self.compress:
+            self._counters["dropped"] += 1
+            return
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        data = zlib.compress(bytes(bits), 1)
+        self._rasters[key] = (
+            data,
+            image.width(),
+            image.height(),
+            image.bytesPerLine(),
+            image.format(),
+        )
+        self._compressed_bytes += len(data)
+        while self._rasters and self._compressed_bytes > self.max_compressed:
+            self._compressed_bytes -= len(self._rasters.popitem(last=False)[1][0])
+            self._counters["dropped"] += 1
 
 
 class ApplicationWindow(QMainWindow):
@@ -539,6 +810,13 @@ class ApplicationWindow(QMainWindow):
         fileMenu.addAction(closeApp)
         self.plotNum = 0
         self.fig = Figure()
+        self.plotObjList: list[Any] = []
+        # rendering jobs and rendered plots (bounded cache, cf PlotCache)
+        self.jobs: list[Callable[[], Figure]] = []
+        self.cache = PlotCache()
+        self.renderer = RenderScheduler(self)
+        self.renderer.rendered.connect(self.on_rendered)
+        self.renderer.progress.connect(self.on_progress)
         self.assign_central_Widget()
         self.home()
 
@@ -548,10 +826,11 @@ class ApplicationWindow(QMainWindow):
         # mainWidget
         self.main_widget = QWidget(self)
         self.hbl = QHBoxLayout(self.main_widget)
-        # instantiate our Matplotlib canvas widget
+        # instantiate our Matplotlib canvas widget (the single one, cf blit_image)
         self.qmc = Qt5MplCanvas(self.main_widget, self.fig)
         # self.gas = SelectGas(gases, gasesV)
         self.gas = SelectGas()  # reset des valeurs
+        self.gas.gasChanged.connect(self.cancel_rendering)
         # instantiate the navigation toolbar
         # self.ntb = NavigationToolbar(self.qmc, self.main_widget)
         # pack these widget into the vertical box
@@ -563,18 +842,77 @@ class ApplicationWindow(QMainWindow):
         self.setCentralWidget(self.main_widget)
 
     def update_central_widget(self) -> None:
-        """Update the central widget."""
+        """
+        Show the current plot in the central widget.
+
+        the canvas is reused (the pre-rendered image is blitted),
+        the widgets are rebuilt only if the central widget has been replaced
+        (ie by the editor).
+        NB latency target for the plot navigation (previous/next) :
+            < 100 ms per step (cf benchmark_navigation)
+        """
         # print('f=update_central_widget')
-        self.main_widget = QWidget(self)
-        self.hbl = QHBoxLayout(self.main_widget)
-        # instantiate our Matplotlib canvas widget
-        self.qmc = Qt5MplCanvas(self.main_widget, self.fig)
-        # self.ntb = NavigationToolbar(self.qmc, self.main_widget)
-        self.hbl.addWidget(self.gas)
-        self.hbl.addWidget(self.qmc)
-        self.main_widget.setFocus()
-        # set the central widget of MainWindow to main_widget
-        self.setCentralWidget(self.main_widget)
+        if self.centralWidget() is not self.main_widget:
+            self.assign_central_Widget()
+        self.renderer.focus(self.plotNum)
+        image = None
+        if self.plotNum < len(self.jobs):
+            image = self.cache.get(self.plotNum)
+            if image is None:
+                # evicted, not yet rendered, cancelled or failed (retry)
+                self.renderer.request(self.plotNum, self.jobs[self.plotNum])
+        if image is None:
+            self.statusBar().showMessage(f"rendering plot {self.plotNum} ...")
+        else:
+            self.qmc.blit_image(image)
+            self.statusBar().clearMessage()
+
+    def release_plots(self) -> None:
+        """Free the previous figures and images (before building new ones)."""
+        self.renderer.cancel()
+        for fig in self.plotObjList:
+            if fig is not self.qmc.figure:
+                fig.clear()
+        self.plotObjList = []
+        logging.info(f"plot cache {self.cache.stats()}")
+        self.cache.clear()
+        self.jobs = []
+
+    @pyqtSlot(int, int, object)
+    def on_rendered(self, generation: int, index: int, image: Any) -> None:
+        """Store a rendered plot (and show it if it is the current one)."""
+        if generation != self.renderer.generation:
+            return
+        if image is None:
+            # the error is logged by the worker
+            if index == self.plotNum:
+                self.statusBar().showMessage(
+                    f"plot {index} rendering failed (cf log), select it to retry"
+                )
+            return
+        self.cache.put(index, image)
+        if index == self.plotNum:
+            self.qmc.blit_image(image)
+            self.statusBar().clearMessage()
+
+    @pyqtSlot(int, int)
+    def on_progress(self, done: int, total: int) -> None:
+        """Show the rendering progress in the toolbar."""
+        self.progressBar.setMaximum(total)
+        self.progressBar.setValue(done)
+
+    @pyqtSlot(int)
+    def cancel_rendering(self, num: int = 0) -> None:
+        """Cancel the pending plots (ie the selected gas has changed)."""
+        if self.renderer.generation and len(self.jobs):
+            self.renderer.cancel()
+            self.progressBar.reset()
+            self.statusBar().showMessage(f"gas {num} selected, rebuild the plots")
+
+    def closeEvent(self, event: Any) -> None:
+        """Stop the rendering thread."""
+        self.renderer.stop()
+        super().closeEvent(event)
 
     def home(self) -> None:
         """Build the buttons for the toolbar."""
@@ -594,6 +932,11 @@ class ApplicationWindow(QMainWindow):
         self.toolBar.addAction(previousP)
         self.toolBar.addAction(nextP)
         self.toolBar.addAction(selectParams)
+        # rendering progress
+        self.progressBar = QProgressBar()
+        self.progressBar.setMaximumWidth(200)
+        self.progressBar.setFormat("%v/%m plots")
+        self.toolBar.addWidget(self.progressBar)
 
     def build_plots(
         self,
@@ -604,17 +947,28 @@ class ApplicationWindow(QMainWindow):
         ident: str = "",
         pyplot: bool = False,
     ) -> None:
-        """Build the plots."""
+        """
+        Build the plots.
+
+        the plots are rendered on a worker thread (cf RenderScheduler),
+        the current one first, and shown when ready.
+        """
         self.plotNum = plotNum  # reset the plot count
-        # num = self.gas.num
-        # gases = copy.deepcopy(self.gas.gases)  # ??? needed
-        self.plotObjList: list[Any] = []
-        # print('sending num=', num, 'hb=', gases[num].hb)
-        self.select_plots(
-            "clin", self.gas.gases, self.gas.num, path, ident, save, pyplot
-        )
-        # print('sending num=', num)
-        self.fig = self.plotObjList[self.plotNum]
+        self.release_plots()
+        if pyplot:
+            self.select_plots(
+                "clin", self.gas.gases, self.gas.num, path, ident, save, pyplot
+            )
+            return
+        # the worker uses a copy (the gases can be edited meanwhile)
+        gases = copy.deepcopy(self.gas.gases)
+        for name in self.select_plots("clin"):
+            self.jobs.extend(
+                self.plot_jobs(name, gases, self.gas.num, path, ident, save)
+            )
+        ratio = self.qmc.device_pixel_ratio
+        size = (int(self.qmc.width() * ratio), int(self.qmc.height() * ratio))
+        self.renderer.submit(self.jobs, self.plotNum, size)
         self.update_central_widget()
 
     def previous_plot(self) -> None:
@@ -628,7 +982,6 @@ class ApplicationWindow(QMainWindow):
         #     return
         if self.plotNum > 0:
             self.plotNum -= 1
-            self.fig = self.plotObjList[self.plotNum]
             self.update_central_widget()
         else:
             QMessageBox.information(self, "str", "this is already the first plot")
@@ -643,9 +996,8 @@ class ApplicationWindow(QMainWindow):
         #             "you have to 'build plots' before to navigate")
         #     return
 
-        if self.plotNum < (len(self.plotObjList) - 1):
+        if self.plotNum < (len(self.jobs) - 1):
             self.plotNum += 1
-            self.fig = self.plotObjList[self.plotNum]
             self.update_central_widget()
         else:
             QMessageBox.information(self, "str", "this is the last plot")
@@ -717,80 +1069,8 @@ class ApplicationWindow(QMainWindow):
             return
         if pyplot is False:
             logging.warning(f"{name=} {len(gases)=}, {num=}")
-            if name == "display":
-                self.plotObjList.append(
-                    bgplot.plot_display(gases, num, path, ident, save, pyplot)
-                )
-            if name == "morpion":
-                self.plotObjList.append(
-                    bgplot.plot_morpion(gases, num, path, ident, save, pyplot)
-                )
-            if name == "acidBAse":
-                self.plotObjList.append(
-                    bgplot.plot_acidbas(gases, num, path, ident, save, pyplot)
-                )
-            if name == "o2":
-                self.plotObjList.append(
-                    bgplot.plot_o2(gases, num, path, ident, save, pyplot)
-                )
-            if name == "ventil":
-                self.plotObjList.append(
-                    bgplot.plot_ventil(gases, num, path, ident, save, pyplot)
-                )
-            if name == "sat":
-                self.plotObjList.append(
-                    bgplot.plot_satHb(gases, num, path, ident, save, pyplot)
-                )
-            if name == "cao2":
-                self.plotObjList.append(
-                    bgplot.plot_CaO2(gases, num, path, ident, save, pyplot)
-                )
-            if name == "hbEffect":
-                self.plotObjList.append(
-                    bgplot.plot_hbEffect(gases, num, path, ident, save, pyplot)
-                )
-            if name == "varCaO2":
-                self.plotObjList.append(
-                    bgplot.plot_varCaO2(gases, num, path, ident, save, pyplot)
-                )
-            if name == "pieCasc":
-                self.plotObjList.append(
-                    bgplot.plot_pieCasc(gases, num, path, ident, save, True, pyplot)
-                )
-                self.plotObjList.append(
-                    bgplot.plot_pieCasc(gases, num, path, ident, save, False, pyplot)
-                )
-            if name == "cascO2":
-                if num == 0:
-                    self.plotObjList.append(
-                        bgplot.plot_cascO2Lin(gases, [0], path, ident, save, pyplot)
-                    )
-                #                self.plotObjList.append(bgplot.plot_cascO2(gases, \
-                # [0,len(gases)-1], path, ident, save, pyplot))
-                #                self.plotObjList.append(bgplot.plot_cascO2Lin(gases, \
-                # [0,len(gases)-1], path, ident, save, pyplot))
-                else:
-                    self.plotObjList.append(
-                        bgplot.plot_cascO2Lin(
-                            gases, list(range(len(gases))), path, ident, save, pyplot
-                        )
-                    )
-            if name == "gAa":
-                self.plotObjList.append(
-                    bgplot.plot_GAa(gases, num, path, ident, save, pyplot)
-                )
-            if name == "GAaRatio":
-                self.plotObjList.append(
-                    bgplot.plot_GAaRatio(gases, num, path, ident, save, pyplot)
-                )
-            if name == "ratio":
-                self.plotObjList.append(
-                    bgplot.plot_ratio(gases, num, path, ident, save, pyplot)
-                )
-            # print('len(self.plotObjList=', len(self.plotObjList))
-        #            for fig in self.plotObjList:
-        #                fig.set_tight_layout(False)
-
+            for job in self.plot_jobs(name, gases, num, path, ident, save):
+                self.plotObjList.append(job())
         else:
             if name == "display":
                 bgplot.plot_display(gases, num, path, ident, save, pyplot)
@@ -826,17 +1106,48 @@ class ApplicationWindow(QMainWindow):
             if name == "ratio":
                 bgplot.plot_ratio(gases, num, path, ident, save, pyplot)
 
+    def plot_jobs(
+        self, name: str, gases: Any, num: int, path: str, ident: str, save: bool
+    ) -> list[Callable[[], Figure]]:
+        """Return the functions building the 'name' plots (matplotlib.Figure)."""
+        args = (path, ident, save, False)
+        funcs = {
+            "display": bgplot.plot_display,
+            "morpion": bgplot.plot_morpion,
+            "acidBAse": bgplot.plot_acidbas,
+            "o2": bgplot.plot_o2,
+            "ventil": bgplot.plot_ventil,
+            "sat": bgplot.plot_satHb,
+            "cao2": bgplot.plot_CaO2,
+            "hbEffect": bgplot.plot_hbEffect,
+            "varCaO2": bgplot.plot_varCaO2,
+            "gAa": bgplot.plot_GAa,
+            "GAaRatio": bgplot.plot_GAaRatio,
+            "ratio": bgplot.plot_ratio,
+        }
+        if name == "pieCasc":
+            return [
+                partial(
+                    bgplot.plot_pieCasc, gases, num, path, ident, save, pcent, False
+                )
+                for pcent in [True, False]
+            ]
+        if name == "cascO2":
+            nums = [0] if num == 0 else list(range(len(gases)))
+            return [partial(bgplot.plot_cascO2Lin, gases, nums, *args)]
+        return [partial(funcs[name], gases, num, *args)]
+
     def select_plots(
         self,
         name: str,
-        gases: Any,
-        num: int,
-        path: str,
-        ident: str,
-        save: bool,
-        pyplot: bool,
+        gases: Any = None,
+        num: int = 0,
+        path: str = "",
+        ident: str = "",
+        save: bool = False,
+        pyplot: bool = False,
     ) -> list[str]:
-        """Select the plots to be build."""
+        """Select the plots to be build (only return the selection if no gases)."""
         # print('f select_plots')
         pcent = False
         selections = {}
@@ -878,6 +1189,8 @@ class ApplicationWindow(QMainWindow):
             print("name shoud be 'all' or 'clin'")
             selection = []
 
+        if gases is None:
+            return selection
         for item in selection:
             self.plot_now(item, gases, num, path, ident, save, pyplot, pcent)
         return selection
@@ -886,6 +1199,83 @@ class ApplicationWindow(QMainWindow):
 
 
 ##############################################################################
+def benchmark_navigation(steps: int = 20, timeout: float = 120) -> dict[str, float]:
+    """
+    Measure the plot navigation latency (previous/next) with an offscreen Qt.
+
+    NB to be run in a fresh process, ie
+    QT_QPA_PLATFORM=offscreen python -c "import bgmain_gui; \
+        print(bgmain_gui.benchmark_navigation())"
+
+    Parameters
+    ----------
+    steps : int, optional (default is 20)
+        number of navigation steps (back and forth in the plot list).
+    timeout : float, optional (default is 120)
+        maximal waiting time for the rendering (s).
+
+    Returns
+    -------
+    dict[str, float]
+        first : time to show the first plot (s),
+        build : time to render all the plots (s),
+        mean, max : latency per navigation step, blit included (s).
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+    aw = ApplicationWindow()
+    aw.show()
+    app.processEvents()
+    # completion signal of the scheduler (the cache can drop the rasters)
+    progress = {"done": -1, "total": 0}
+
+    def on_progress(done: int, total: int) -> None:
+        progress.update(done=done, total=total)
+
+    aw.renderer.progress.connect(on_progress)
+
+    def wait(ready: Callable[[], bool]) -> None:
+        limit = timeit.default_timer() + timeout
+        while not ready():
+            if timeit.default_timer() > limit:
+                aw.close()
+                raise TimeoutError(f"rendering not done after {timeout} s")
+            app.processEvents()
+            time.sleep(0.001)
+
+    start = timeit.default_timer()
+    aw.build_plots()
+    wait(lambda: aw.plotNum in aw.cache)
+    first = timeit.default_timer() - start
+    wait(lambda: progress["done"] >= progress["total"])
+    build = timeit.default_timer() - start
+    latencies = []
+    forward = True
+    for _ in range(steps):
+        if forward and aw.plotNum == len(aw.jobs) - 1:
+            forward = False
+        elif not forward and aw.plotNum == 0:
+            forward = True
+        start = timeit.default_timer()
+        if forward:
+            aw.next_plot()
+        else:
+            aw.previous_plot()
+        app.processEvents()
+        latencies.append(timeit.default_timer() - start)
+    logging.info(f"plot cache {aw.cache.stats()}")
+    aw.close()
+    res = {
+        "first": first,
+        "build": build,
+        "mean": sum(latencies) / steps,
+        "max": max(latencies),
+    }
+    logging.info(f"{res=}")
+    return res
+
 
 # ==============================================================================
 # if __name__ == '__main__':
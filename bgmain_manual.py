@@ -14,7 +14,7 @@ import sys
 import faulthandler
 import logging
 from typing import Optional
-from typing import Tuple, Any, List, Dict, Callable
+from typing import Tuple, Any, List, Dict, Callable, Iterator
 
 # from importlib import reload
 from socket import gethostname
@@ -28,7 +28,9 @@ import numpy as np
 import pandas as pd
 from PyQt5.QtWidgets import QFileDialog
 
+import bgio
 import bgplot
+import bgrender
 
 logfile = os.path.expanduser(os.path.join("~", "blood_gases.log"))
 logging.basicConfig(
@@ -172,6 +174,7 @@ def build_xcel_model(dirname: str = None) -> None:
     print(f"{filename=}")
 
 
+@bgio.parse_cached
 def load_xcel_file(bgfilename: str) -> pd.DataFrame:
     """
     Load the excel file containing the blood gases values.
@@ -186,6 +189,8 @@ def load_xcel_file(bgfilename: str) -> pd.DataFrame:
     bgdf : pd.DataFrame
         the data.
 
+    NB served from the parsed-file cache if enabled (bgio.use_parse_cache)
+
     """
     bgdf = pd.read_excel(bgfilename, parse_dates=[["date", "heure"]]).set_index(
         "date_heure"
@@ -193,7 +198,12 @@ def load_xcel_file(bgfilename: str) -> pd.DataFrame:
     return bgdf
 
 
-def add_o2co2_toBg(bgdf: pd.DataFrame, monitortrend: pd.DataFrame) -> pd.DataFrame:
+def add_o2co2_toBg(
+    bgdf: pd.DataFrame,
+    monitortrend: pd.DataFrame,
+    window: datetime.timedelta = datetime.timedelta(minutes=3),
+    agg: Any = "median",
+) -> pd.DataFrame:
     """
     Extract o2 and co2 from a monitorTrend, and fill the bloodgases dataframe.
 
@@ -203,20 +213,26 @@ def add_o2co2_toBg(bgdf: pd.DataFrame, monitortrend: pd.DataFrame) -> pd.DataFra
         the blood gases values.
     monitortrend : pd.DataFrame
         a corresponding monitorTrend record.
+    window : datetime.timedelta, optional (default is 3 minutes)
+        the trend values in [time - window, time + window] are used.
+    agg : str or Callable, optional (default is "median")
+        the aggregation of the window (cf bgio.align_trend).
 
     Returns
     -------
     bgdf : pd.DataFrame
         the blood gases values.
+        (bgdf.attrs['o2co2_matched'] : number of trend samples used per gas)
 
     """
     df = monitortrend.data[["datetime", "o2insp", "co2exp"]].set_index("datetime")
-    tdelta = datetime.timedelta(minutes=3)
-    dt = bgdf.index[1]
-    for dt in bgdf.index:
-        o2insp, co2exp = df.loc[dt - tdelta : dt + tdelta].median()
-        bgdf.loc[dt, ["fio2", "etco2"]] = o2insp, co2exp
-        print(dt, o2insp, co2exp)
+    values, counts = bgio.align_trend(bgdf.index, df, window, agg)
+    bgdf[["fio2", "etco2"]] = values[["o2insp", "co2exp"]].to_numpy()
+    bgdf.attrs["o2co2_matched"] = counts.tolist()
+    logging.info(
+        f"{np.count_nonzero(counts)}/{len(counts)} gases matched,"
+        f" {counts.sum()} trend samples ({window=}, {agg=})"
+    )
     return bgdf
 
 
@@ -263,7 +279,7 @@ def append_from_dico(
     gas = bgplot.Gas(**dico)
     gaslist.append(gas)
     name = "g" + str(len(gaslist) - 1)
-    gasvisu[name] = gas.__dict__
+    gasvisu[name] = gas.visu()
     print(f"{'-' * 15} added a new gas from dico")
     for k, v in dico.items():
         print(f"{k:>6s}= {v}")
@@ -362,6 +378,7 @@ def choosefile_gui(dirname: str = None) -> str:
     return str(fname)
 
 
+@bgio.parse_cached
 def csv_to_df(filename: str) -> pd.DataFrame:
     """
     Append new gases from a csvFile to gases & gasesV.
@@ -377,43 +394,27 @@ def csv_to_df(filename: str) -> pd.DataFrame:
     Return
     ------
         df:  pad.DataFrame
-    """
-    key_list = ["spec", "hb", "fio2", "po2", "ph", "pco2", "hco3", "etco2"]
-    # load file as pd.DataFrame
-    df = pd.read_csv(filename, sep="\t", decimal=",")
-    # adapt the columns
-    cols = list(map(str.lower, df.columns))
-    cols = [st.replace("+", "") for st in cols]
-    cols = [st.replace("-", "") for st in cols]
-    df.columns = cols
-    df = pd.DataFrame(df)
-    # rename if required
-    corr_title = {"thb": "hb"}
-    df.rename(columns=corr_title, inplace=True)
+            ('spec' category, the other gas columns float64, cf bgio.COLUMN_DTYPES)
 
+    NB served from the parsed-file cache if enabled (bgio.use_parse_cache)
+    """
+    # load file as pd.DataFrame ('spec' category, floats, cf bgio.COLUMN_DTYPES)
+    header = pd.read_csv(filename, sep="\t", nrows=0).columns
+    df = pd.read_csv(
+        filename,
+        sep="\t",
+        decimal=",",
+        dtype=bgio.declared_dtypes(header),
+        float_precision="round_trip",
+    )
+    # adapt the columns (cf bgio.iter_chunks for the large files)
+    df.columns = bgio.normalize_columns(df.columns)
     # test for missing columns
-    for item in key_list:
-        if item not in df.columns:
-            print(item, "is missing in the file")
-            return pd.DataFrame()
+    for item in bgio.missing_columns(df.columns):
+        print(item, "is missing in the file")
+        return pd.DataFrame()
     # change the NaN by default values
-    ref = {
-        "spec": "horse",
-        "hb": 12,
-        "fio2": 0.21,
-        "po2": 95,
-        "ph": 7.4,
-        "pco2": 40,
-        "hco3": 24,
-        "etco2": 38,
-    }
-    for col in df.columns:
-        if col in ref:
-            if df[col].hasnans:
-                print("there are missing values in ", col)
-                print("they will be replaced by ", ref[col])
-                df[col] = df[col].fillna(ref.get(col))
-    return df
+    return bgio.fill_reference(df)
 
 
 def df_append_to_gases(
@@ -429,7 +430,7 @@ def df_append_to_gases(
     gas_list : list
         of Gas objects
     gas_visu : list
-        of __dict__ of Gas Objects
+        of read-only views of the Gas Objects (Gas.visu())
 
     Returns
     -------
@@ -442,14 +443,15 @@ def df_append_to_gases(
     # initialise if empty
     if gaslist is None:
         gaslist, gasvisu = append_from_dico(None)
-    # fill line by line
-    for i in range(len(df)):
-        newgaslist, newgasvisu = append_from_dico(
-            df.iloc[i].to_dict(), gaslist=gaslist, gasvisu=gasvisu
-        )
-    print("_" * 15)
-    print(f"added {i} gases to the gas list")
-    return newgaslist, newgasvisu
+    if gasvisu is None:
+        gasvisu = {f"g{i}": gas.visu() for i, gas in enumerate(gaslist)}
+    # bulk build (one pass over the columns, cf bgplot.Gas.from_frame)
+    start = len(gaslist)
+    gases = bgplot.Gas.from_frame(df)
+    gaslist.extend(gases)
+    gasvisu.update({f"g{start + i}": gas.visu() for i, gas in enumerate(gases)})
+    logging.info(f"added {len(gases)} gases to the gas list ({len(gaslist)} gases)")
+    return gaslist, gasvisu
 
 
 # build the reference set (ie room air, normal lung, normal respiratory state)
@@ -489,8 +491,7 @@ if addgas:
     file_name = os.path.join(paths_b.record_, file)
 
     in_df = csv_to_df(file_name)
-    for i in range(len(in_df)):
-        append_from_dico(in_df.iloc[i].to_dict(), gaslist=gas_list, gasvisu=gas_visu)
+    gas_list, gas_visu = df_append_to_gases(in_df, gas_list, gas_visu)
 
 # %% h5 file
 addgas = False
@@ -499,8 +500,7 @@ if addgas:
     paths_b.airline_ = airline
 
     in_df = pd.read_hdf(os.path.join(paths_b.airline_, "bg20_08_16.h5"))
-    for i in range(len(in_df)):
-        append_from_dico(in_df.iloc[i].to_dict(), gaslist=gas_list, gasvisu=gas_visu)
+    gas_list, gas_visu = df_append_to_gases(in_df, gas_list, gas_visu)
 save = False
 if save:
     file_name = os.path.join(
@@ -515,30 +515,28 @@ if save:
 plt.close("all")
 
 
-def plot_figs(gases: list[Any], **kwargs: Any) -> plt.Figure:
+def fig_jobs(
+    gases: list[Any], **kwargs: Any
+) -> Iterator[Tuple[str, Callable, Any, Dict[str, Any]]]:
     """
-    Plot the gases.
+    List the plots of plot_figs without building them.
 
     Parameters
     ----------
     gases : list of gases objects
-    **kwargs : arguments to use the list
-        'key' in ['clin', 'all'] : graphs to plot
-        'num' (default =  1) : gas to plot
-        'reverse' (True) : order of the plotting
-        'saveit' (False)
-        'ident' () : added to the name of the plot for reuse
-        'pyplot' (True) pyplot or matplotlib.Figure
-        'path' ('~/test') : to save
-        'folder' ('fig') : added to the save path
-        'name'('None') = id of the animal
+    **kwargs : arguments to use the list (cf plot_figs)
 
-    Returns
-    -------
-    figlist : list of plotted figures
-    fignames : list of figures suptitles
+    Yields
+    ------
+    figname : str
+        the figure name ('pieCascPercent' for the pcent pie)
+    func : Callable
+        the bgplot function.
+    nums : int or list
+        the gases used by the plot.
+    kwds : dict
+        the other parameters, ie fig = func(gases, nums, **kwds)
     """
-    # print(kwargs)
     params: Dict[str, Any] = {
         "key": "clin",
         "num": 1,
@@ -547,45 +545,12 @@ def plot_figs(gases: list[Any], **kwargs: Any) -> plt.Figure:
         "ident": "",
         "pyplot": True,
         "path": "~/test",
-        "folder": "fig",
-        "name": None,
     }
     params.update(kwargs)
-    # functions list
+    # functions list (cf bgrender.PLOT_SETS)
     plot_dico: Dict[str, List[Callable]] = {
-        "all": [
-            bgplot.plot_display,
-            bgplot.plot_morpion,
-            bgplot.plot_acidbas,
-            bgplot.plot_o2,
-            bgplot.plot_ventil,
-            bgplot.plot_satHb,
-            bgplot.plot_cascO2,
-            bgplot.plot_hbEffect,
-            bgplot.plot_varCaO2,
-            bgplot.plot_pieCasc,
-            bgplot.plot_cascO2,
-            bgplot.plot_cascO2Lin,
-            bgplot.plot_GAa,
-            bgplot.plot_GAaRatio,
-            bgplot.plot_ratio,
-        ],
-        "clin": [
-            bgplot.plot_display,
-            bgplot.plot_morpion,
-            bgplot.plot_acidbas,
-            bgplot.plot_o2,
-            bgplot.plot_ventil,
-            bgplot.plot_satHb,
-            bgplot.plot_CaO2,
-            bgplot.plot_hbEffect,
-            bgplot.plot_varCaO2,
-            bgplot.plot_pieCasc,
-            bgplot.plot_cascO2Lin,
-            bgplot.plot_GAa,
-            bgplot.plot_GAaRatio,
-            bgplot.plot_ratio,
-        ],
+        kind: [getattr(bgplot, func_name) for func_name in names]
+        for kind, names in bgrender.PLOT_SETS.items()
     }
     if params["reverse"]:
         # reverse the order of the display
@@ -602,47 +567,156 @@ def plot_figs(gases: list[Any], **kwargs: Any) -> plt.Figure:
             func_list = [func for func in plot_dico["all"] if func.__name__ == key]
         else:
             print("key shoud be in ", all_names)
-            return plt.Figure()
-    figlist = []
-    fignames = []
-    path = params["path"]
-    ident = params["ident"]
-    # breakpoint()
-    saveit = params["saveit"]
-    pyplot = params["pyplot"]
+            return
     num = int(params["num"])  # :int
-    name = params.get("name", None)
+    kwds = {
+        "savedir": params["path"],
+        "ident": params["ident"],
+        "saveit": params["saveit"],
+        "pyplot": params["pyplot"],
+    }
     for func in func_list:
+        figname = func.__name__.split("_")[-1]
         if func.__name__ == "plot_cascO2Lin":
             # this function needs a list of gases
-            # measure + ref
-            # fig = func(gases, [0, num], path, ident, saveit, pyplot)
             # all until measure
-            fig = func(gases, list(range(num + 1)), path, ident, saveit, pyplot)
-            # fig = item(gases, list(range(len(gases))), path, ident, save, pyplot)
+            yield figname, func, list(range(num + 1)), kwds
         elif func.__name__ == "plot_cascO2":
             # this function needs a list of gases
             # measure + ref
-            fig = func(gases, [0, num], path, ident, saveit, pyplot)
-            # all measures
-            # fig = item(gases, list(range(len(gases))), path, ident, save, pyplot)
+            yield figname, func, [0, num], kwds
         elif func.__name__ == "plot_pieCasc":
-            fig = func(
-                gases, num, path, ident="", saveit=saveit, pcent=True, pyplot=pyplot
-            )
-            fig = func(
-                gases, num, path, ident="", saveit=saveit, pcent=False, pyplot=pyplot
-            )
+            for pcent in [True, False]:
+                pie_kwds = dict(kwds, ident="", pcent=pcent)
+                yield figname + ("Percent" if pcent else ""), func, num, pie_kwds
         else:
-            fig = func(gases, num, path, ident, saveit, pyplot)
+            yield figname, func, num, kwds
+
+
+def iter_figs(gases: list[Any], **kwargs: Any) -> Iterator[Tuple[str, Any]]:
+    """
+    Plot the gases, one figure at a time (streaming mode of plot_figs).
+
+    Parameters
+    ----------
+    gases : list of gases objects
+    **kwargs : arguments to use the list (cf plot_figs)
+
+    Yields
+    ------
+    figname : str
+        the figure name ('pieCascPercent' for the pcent pie)
+    fig : plt.Figure or matplotlib.Figure (footers applied)
+
+    NB to save the figures as soon as they are built (the memory does not grow
+    with the number of plots), cf save_figs.
+    """
+    name = kwargs.get("name", None)
+    for figname, func, nums, kwds in fig_jobs(gases, **kwargs):
+        fig = func(gases, nums, **kwds)
+        bgrender.stamp_figure(fig, name)
+        yield figname, fig
+        del fig
+
+
+def save_figs(
+    gases: list[Any],
+    path: str = "~/test",
+    ext: str = "png",
+    ident: str = "",
+    cache: bool = False,
+    **kwargs: Any,
+) -> List[str]:
+    """
+    Build and save the plots one at a time (each figure is written once).
+
+    Parameters
+    ----------
+    gases : list of gases objects
+    path : str, optional (default is "~/test")
+        the destination folder.
+    ext : str, optional (default is "png")
+        the file format.
+    ident : str, optional (default is "")
+        added to the file names (<path>/<ident><figname>.<ext>).
+    cache : bool, optional (default is False)
+        serve the unchanged plots from the render cache (bgrender.RenderCache),
+        the new ones are stored in.
+    **kwargs : the plots to build (cf plot_figs: key, num, reverse, name)
+        (pyplot is False by default)
+
+    Returns
+    -------
+    List[str]
+        the saved files.
+    """
+    path = os.path.expanduser(path)
+    kwargs.update(saveit=False)
+    kwargs.setdefault("pyplot", False)
+    name = kwargs.get("name", None)
+    render_cache = None
+    if cache:
+        render_cache = bgrender.get_render_cache() or bgrender.use_render_cache()
+    saved = []
+    for figname, func, nums, kwds in fig_jobs(gases, **kwargs):
+        filename = os.path.join(path, str(ident) + figname)
+        file = filename + "." + ext.strip(".")
+        key = None
+        if render_cache is not None:
+            used = [gases[i] for i in np.atleast_1d(nums)]
+            # (the destination folder is not part of the render)
+            params = {k: v for k, v in kwds.items() if k != "savedir"}
+            key = bgrender.render_key(
+                func.__name__, used, nums=nums, name=name, ext=ext, **params
+            )
+            if render_cache.copy(key, path, ext, name=os.path.basename(file)):
+                logging.info(f"{figname} served from the render cache")
+                saved.append(file)
+                continue
+        fig = func(gases, nums, **kwds)
+        bgrender.stamp_figure(fig, name)
+        # stored in the render cache (if any) by saveGraph
+        with bgrender.keyed(key, missed=True):
+            bgplot.saveGraph(filename, ext=ext, close=True, verbose=False, fig=fig)
+        if fig.canvas.manager is None:
+            # a bare Figure
+            fig.clear()
+        saved.append(file)
+        del fig
+    return saved
+
+
+def plot_figs(gases: list[Any], **kwargs: Any) -> plt.Figure:
+    """
+    Plot the gases.
+
+    Parameters
+    ----------
+    gases : list of gases objects
+    **kwargs : arguments to use the list
+        'key' in ['clin', 'all'] : graphs to plot
+        'num' (default =  1) : gas to plot
+        'reverse' (True) : order of the plotting
+        'saveit' (False)
+        'ident' () : added to the name of the plot for reuse
+        'pyplot' (True) pyplot or matplotlib.Figure
+        'path' ('~/test') : to save
+        'folder' ('fig') : added to the save path
+        'name'('None') = id of the animal
+
+    Returns
+    -------
+    figlist : list of plotted figures
+    fignames : list of figures suptitles
+
+    NB all the figures are kept, cf iter_figs and save_figs to stream them
+    (save_figs can use the render cache).
+    """
+    figlist = []
+    fignames = []
+    for figname, fig in iter_figs(gases, **kwargs):
         figlist.append(fig)
-        fignames.append(func.__name__.split("_")[-1])
-    for fig in figlist:
-        fig.text(0.99, 0.01, "bgPlot", ha="right", va="bottom", alpha=0.4, size=12)
-        if name is None:
-            fig.text(0.01, 0.01, "cDesbois", ha="left", va="bottom", alpha=0.4, size=12)
-        else:
-            fig.text(0.01, 0.01, name, ha="left", va="bottom", alpha=0.4, size=12)
+        fignames.append(figname)
     return figlist, fignames
 
 
@@ -656,17 +730,13 @@ def print_beamer_include(folder: str, figlist: list) -> None:
         the path inside the beamer folder
     fig_list: list
         the figure list
+
+    NB to build the files and the .tex: bgrender.export_beamer
+    (or bgrender.export_pdf for a single multi-page pdf)
     """
     print("******** beamer commands *******")
-    for fig in figlist:
-        txt = os.path.join(folder, fig.split("_")[-1])
-        one = r"\begin{frame}[plain]"
-        two = r"\includegraphics[width=\linewidth]{%s}" % txt
-        three = r"\end{frame}"
-        print(one)
-        print(two)
-        print(three)
-        print()
+    files = [os.path.join(folder, fig.split("_")[-1]) for fig in figlist]
+    print(bgrender.beamer_frames(files))
 
 
 # (NB pyplot = True return a pyplot, False return a matplotnib Figure Obj)
@@ -697,6 +767,13 @@ if plot:
     fig_list, fig_names = plot_figs(gas_list, **varDico)
     print_beamer_include(varDico["folder"], fig_names)
 
+# %% to export the plots (multi-page pdf or beamer)
+export = False
+if export:
+    nums = [varDico["num"]]
+    bgrender.export_pdf(gas_list, os.path.join("~", "test", "bg.pdf"), nums)
+    bgrender.export_beamer(gas_list, os.path.join("~", "test", "bg.tex"), nums)
+
 # %% to plot the standart ventil figures
 if plot:
     picts = [
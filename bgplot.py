@@ -6,19 +6,32 @@ Created on Tue Feb 16 15:26:14 2016.
 @author: cdesbois
 """
 
+import io
 import os
+import abc
 import logging
+import timeit
+import weakref
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from contextlib import contextmanager
 from typing import Any, Set, Optional, Callable
 from math import floor, ceil
 
 import matplotlib.pyplot as plt
 import matplotlib.image as mpimg
 from matplotlib.figure import Figure
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib import rcParams
 from matplotlib.ticker import FormatStrFormatter
+from matplotlib.collections import LineCollection
 import numpy as np
 import pandas as pd
 
+import bgrender
+
 logfile = os.path.expanduser(os.path.join("~", "blood_gases.log"))
 logging.basicConfig(
     level=logging.INFO,
@@ -54,6 +67,155 @@ def round_lims(limits: Set, round_value: float = 5) -> tuple[float, float]:
     return (mini, maxi)
 
 
+# ==============================================================================
+class _GasRef(weakref.ref):
+    """Weak reference to a registered gas (knows its registry scope and key)."""
+
+    __slots__ = ("scope", "key")
+
+
+class GasRegistry:
+    """
+    Session registry of the Gas objects, bounded and scoped (ie per patient).
+
+    + GasRegistry(maxlen=10000, policy='oldest', weak=True)
+
+    + attributes :
+        maxlen : maximal number of gases per scope \
+        policy : when a scope is full, 'oldest' evicts the oldest entry,
+                'newest' doesn't register the new gas \
+        weak : True keeps weak references (the registry doesn't keep the gases
+                alive), False owns the gases (evicted ones can be freed) \
+        current : the name of the active scope \
+    + methods :
+        register : add a gas in the active scope \
+        scope : context manager to activate a scope (ie a patient) \
+        gases : return the live gases of a scope \
+        clear : empty a scope (or all) \
+        stats : return the counters (live, created, collected, evicted, scopes) \
+
+    NB evicted (or cleared) gases are still counted as 'live' until collected.
+    The weakref callbacks can run on any thread (ie the GUI render worker):
+    they only queue the collected references, the registry state is updated
+    under a lock by the methods (register, gases, clear, stats).
+    """
+
+    def __init__(
+        self, maxlen: Optional[int] = 10000, policy: str = "oldest", weak: bool = True
+    ) -> None:
+        if policy not in ["oldest", "newest"]:
+            raise ValueError(f"{policy=} should be in ['oldest', 'newest']")
+        self.maxlen = maxlen
+        self.policy = policy
+        self.weak = weak
+        self.current = "session"
+        self._scopes: dict[str, OrderedDict[int, Any]] = {}
+        # weak references to the evicted (or cleared) gases still in memory
+        self._released: set[_GasRef] = set()
+        self._counters = {"created": 0, "collected": 0, "evicted": 0, "refused": 0}
+        self._lock = threading.RLock()
+        # collected references, waiting to be forgotten (cf _drain)
+        self._pending: deque[_GasRef] = deque()
+        # a single bound method shared by all the weak references
+        self._callback = self._pending.append
+
+    def _drain(self) -> None:
+        """Forget the collected gases (lock held)."""
+        while self._pending:
+            ref = self._pending.popleft()
+            if ref.scope is None:
+                self._released.discard(ref)
+            else:
+                entries = self._scopes.get(ref.scope)
+                if entries is not None and entries.get(ref.key) is ref:
+                    del entries[ref.key]
+            self._counters["collected"] += 1
+
+    def _ref(self, gas: Any, scope: Optional[str]) -> _GasRef:
+        """Build a weak reference to a gas."""
+        ref = _GasRef(gas, self._callback)
+        ref.scope = scope
+        ref.key = id(gas)
+        return ref
+
+    def _release(self, item: Any) -> None:
+        """Keep track of a gas removed from its scope until it is collected."""
+        ref = item if isinstance(item, _GasRef) else self._ref(item, None)
+        ref.scope = None
+        self._released.add(ref)
+
+    def register(self, gas: Any) -> None:
+        """Add a gas in the active scope (applying the cap policy)."""
+        with self._lock:
+            self._drain()
+            self._counters["created"] += 1
+            entries = self._scopes.setdefault(self.current, OrderedDict())
+            if self.maxlen is not None and len(entries) >= self.maxlen:
+                if self.policy == "newest":
+                    self._counters["refused"] += 1
+                    self._release(gas)
+                    return
+                while entries and len(entries) >= self.maxlen:
+                    self._release(entries.popitem(last=False)[1])
+                    self._counters["evicted"] += 1
+            if self.weak:
+                entries[id(gas)] = self._ref(gas, self.current)
+            else:
+                entries[id(gas)] = gas
+
+    @contextmanager
+    def scope(self, name: str) -> Any:
+        """Activate a scope (ie a patient) for the gases built in the block."""
+        previous = self.current
+        self.current = name
+        try:
+            yield self
+        finally:
+            self.current = previous
+
+    def gases(self, scope: Optional[str] = None) -> list[Any]:
+        """Return the live gases of a scope (default the active one)."""
+        with self._lock:
+            self._drain()
+            entries = self._scopes.get(self.current if scope is None else scope, {})
+            items = list(entries.values())
+        if not self.weak:
+            return items
+        return [gas for gas in (ref() for ref in items) if gas is not None]
+
+    def clear(self, scope: Optional[str] = None) -> None:
+        """Empty a scope (default all the scopes)."""
+        with self._lock:
+            self._drain()
+            names = list(self._scopes) if scope is None else [scope]
+            for name in names:
+                for item in self._scopes.pop(name, {}).values():
+                    self._release(item)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the registry counters.
+
+        Returns
+        -------
+        dict[str, Any]
+            live : number of registered Gas objects still in memory,
+            created, collected, evicted, refused : totals since the start,
+            scopes : number of registered gases per scope
+        """
+        with self._lock:
+            self._drain()
+            scopes = {name: len(val) for name, val in self._scopes.items()}
+            stats: dict[str, Any] = {"live": sum(scopes.values()) + len(self._released)}
+            stats.update(self._counters)
+        stats["scopes"] = scopes
+        return stats
+
+
+# the session registry (cf Gas.__init__)
+GAS_REGISTRY = GasRegistry()
+
+
 # ==============================================================================
 class Gas:
     """
@@ -74,11 +236,23 @@ class Gas:
         __str__: return the attributes \
         casc : return the O2 cascade (AlvelarGasEquation) \
         piecasc : return the values to build the cas for all gases \
-
+        sat, cao2, gAa, ratio : satHbO2, CaO2, A-a gradient and PaO2/FiO2 \
+        visu : return a read-only view of the values (for visualisation) \
+        from_frame : (classmethod) build the gases of a DataFrame \
+
+    NB memory (tracemalloc, 20000 gases, shared values):
+        ~ 120 bytes per instance (__slots__, no __dict__) + ~ 230 bytes for the
+        weak registry entry (cf GasRegistry), ie ~ 350 bytes per gas against
+        ~ 160 bytes for the original class (__dict__ + strong list entry),
+        + ~ 390 bytes once gAa, ratio and sat are cached.
+    the registry costs more per gas, but it is bounded and does not keep the
+    gases alive (the original list grew with every gas of the session).
+    The derived values are computed on demand, cached, and invalidated when a
+    measured value is assigned.
     """
 
-    # to store the gasesObj
-    gasesGasList: list[Any] = []
+    measured = ("spec", "hb", "fio2", "po2", "ph", "pco2", "hco3", "etco2")
+    __slots__ = measured + ("_cache", "__weakref__")
 
     def __init__(self, **kwargs: Any) -> None:
         self.spec = kwargs.get("spec", "horse")
@@ -91,12 +265,28 @@ class Gas:
         self.pco2 = kwargs.get("pco2", 40)
         self.hco3 = kwargs.get("hco3", 24)
         self.etco2 = kwargs.get("etco2", 38)
-        Gas.gasesGasList.append(self)
+        GAS_REGISTRY.register(self)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        object.__setattr__(self, key, value)
+        if key in Gas.measured:
+            # invalidate the derived values
+            object.__setattr__(self, "_cache", None)
+
+    def _cached(self, key: str, func: Callable) -> Any:
+        """Return a derived value (computed once, until a measure changes)."""
+        cache = getattr(self, "_cache", None)
+        if cache is None:
+            cache = {}
+            object.__setattr__(self, "_cache", cache)
+        if key not in cache:
+            cache[key] = func()
+        return cache[key]
 
     @classmethod
     def return_gasList(cls) -> list[Any]:
-        """Get global list of gas objects."""
-        return Gas.gasesGasList
+        """Get the live gas objects of the active GAS_REGISTRY scope."""
+        return GAS_REGISTRY.gases()
 
     def values(self) -> dict[str, Any]:
         """Return a dico of measured values."""
@@ -111,6 +301,35 @@ class Gas:
         }
         return values
 
+    def visu(self) -> "GasVisu":
+        """Return a read-only (live) view of the measured values."""
+        return GasVisu(self)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> list["Gas"]:
+        """
+        Build the Gas objects of a DataFrame (one row per gas, bulk).
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            the measured values (missing columns -> Gas defaults, the other
+            columns are ignored).
+
+        Returns
+        -------
+        list[Gas]
+            one gas per row (registered as with Gas()).
+        """
+        keys = [key for key in cls.measured if key in df.columns]
+        # one pass over the columns (no per row Series)
+        columns = [df[key].tolist() for key in keys]
+        gases = [cls(**dict(zip(keys, values))) for values in zip(*columns)]
+        if not keys:
+            gases = [cls() for _ in range(len(df))]
+        logging.info(f"built {len(gases)} gases from {keys}")
+        return gases
+
     # to be able to print values
     def __str__(self) -> str:
         """Str description."""
@@ -118,6 +337,17 @@ class Gas:
         txt2 = f"ph={self.ph} pco2={self.pco2} hco3={self.hco3} etco2={self.etco2}"
         return f"{txt1} \n {txt2}"
 
+    def _casc(self) -> list[float]:
+        ph2o = 47
+        patm = 760
+        casc = []
+        # casc = ([pinsp, paerien, pAo2, pao2])
+        casc.append(self.fio2 * patm)
+        casc.append(self.fio2 * (patm - ph2o))
+        casc.append(self.fio2 * (patm - ph2o) - self.pco2 / 0.8)
+        casc.append(self.po2)
+        return casc
+
     def casc(self) -> list[float]:
         """
         Compute the O2 cascade.
@@ -127,15 +357,28 @@ class Gas:
         list[float]
             list (pinsp, paerien, pAo2 and paO2)
         """
+        return list(self._cached("casc", self._casc))
+
+    def _piecasc(self) -> list[dict[str, float]]:
         ph2o = 47
         patm = 760
-        casc = []
-        # casc = ([pinsp, paerien, pAo2, pao2])
-        casc.append(self.fio2 * patm)
-        casc.append(self.fio2 * (patm - ph2o))
-        casc.append(self.fio2 * (patm - ph2o) - self.pco2 / 0.8)
-        casc.append(self.po2)
-        return casc
+        inspired = {}
+        inspired["O2"] = self.fio2 * patm
+        inspired["N2"] = patm - inspired["O2"]
+
+        aerial = {}
+        aerial["O2"] = self.fio2 * (patm - ph2o)
+        aerial["H2O"] = ph2o
+        aerial["N2"] = patm - aerial["O2"] - aerial["H2O"]
+
+        alveolar = {}
+        alveolar["O2"] = self.fio2 * (patm - ph2o) - self.pco2 / 0.8
+        alveolar["H2O"] = ph2o
+        alveolar["CO2"] = self.pco2
+        alveolar["N2"] = patm - alveolar["O2"] - ph2o - self.pco2
+
+        pieCas = [inspired, aerial, alveolar]
+        return pieCas
 
     def piecasc(self) -> list[dict[str, float]]:
         """
@@ -153,6 +396,230 @@ class Gas:
             values : [pinsp, paerial, pAo2 and paO2]
 
         """
+        return [dict(item) for item in self._cached("piecasc", self._piecasc)]
+
+    def sat(self) -> float:
+        """Return the satHbO2 (%)."""
+        return self._cached("sat", lambda: satHbO2(self.spec, self.po2))
+
+    def cao2(self) -> float:
+        """Return the arterial content in oxygen (ml/l)."""
+        return self._cached("cao2", lambda: caO2(self.spec, self.hb, self.po2))
+
+    def gAa(self) -> float:
+        """Return the alveolo-arterial gradient (PAO2 - PaO2, mmHg)."""
+        casc = self._cached("casc", self._casc)
+        return casc[-2] - casc[-1]
+
+    def ratio(self) -> float:
+        """Return the PaO2 / FiO2 ratio."""
+        return self._cached("ratio", lambda: self.po2 / self.fio2)
+
+
+class GasVisu(Mapping):
+    """
+    Read-only live view of the measured values of a Gas.
+
+    (replace the gas.__dict__ copies in the 'gasesV' visualisation dictionaries)
+    """
+
+    __slots__ = ("_gas",)
+
+    def __init__(self, gas: Gas) -> None:
+        self._gas = gas
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in Gas.measured:
+            raise KeyError(key)
+        return getattr(self._gas, key)
+
+    def __iter__(self) -> Any:
+        return iter(Gas.measured)
+
+    def __len__(self) -> int:
+        return len(Gas.measured)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+# ==============================================================================
+class GasBatch:
+    """
+    Columnar container to manipulate a set of bloodGases.
+
+    + GasBatch(spec=['horse', 'dog'], hb=[12, 15], po2=[95, 88], ...)
+        (missing values are replaced by the Gas defaults)
+
+    + attributes (numpy arrays, one value per gas) :
+        spec_code : species code (index in HILL_TABLE.species) \
+        hb, fio2, po2, ph, pco2, hco3, etco2 : as in the Gas class \
+    + methods :
+        __getitem__ : a Gas view (int) or a GasBatch (slice, mask, indices) \
+        casc : return the O2 cascade of all the gases \
+        piecasc : return the values to build the cas for all the gases \
+        to_gases : return a list of (independant) Gas objects \
+        from_frame, from_gases : (classmethods) build a GasBatch \
+
+    NB a GasBatch can be used in place of the 'gases' list in the plot_* functions.
+    """
+
+    fields = ["hb", "fio2", "po2", "ph", "pco2", "hco3", "etco2"]
+    defaults: dict[str, Any] = {
+        "spec": "horse",
+        "hb": 12,
+        "fio2": 0.21,
+        "po2": 95,
+        "ph": 7.4,
+        "pco2": 40,
+        "hco3": 24,
+        "etco2": 38,
+    }
+
+    def __init__(self, **kwargs: Any) -> None:
+        codes = self.encode_species(kwargs.get("spec", self.defaults["spec"]))
+        columns = [
+            np.asarray(kwargs.get(key, self.defaults[key]), dtype=float)
+            for key in self.fields
+        ]
+        arrays = np.broadcast_arrays(np.atleast_1d(codes), *map(np.atleast_1d, columns))
+        self.spec_code = np.array(arrays[0], dtype=np.int8)
+        for key, arr in zip(self.fields, arrays[1:]):
+            setattr(self, key, np.array(arr, dtype=float))
+        # same rule as Gas : fio2 given in percent
+        self.fio2 = np.where(self.fio2 >= 1, np.round(self.fio2 / 100, 2), self.fio2)
+
+    @classmethod
+    def encode_species(cls, spec: Any) -> np.ndarray:
+        """
+        Return the species codes (index in HILL_TABLE.species).
+
+        Parameters
+        ----------
+        spec : str or array like of str
+            the species names (unknown species are replaced by 'horse').
+
+        Returns
+        -------
+        np.ndarray
+            int8 codes.
+        """
+        names = np.asarray(spec, dtype=str)
+        codes = HILL_TABLE.codes(names)
+        unknown = codes < 0
+        if unknown.any():
+            logging.warning(
+                f"{np.unique(names[unknown]).tolist()} not in {HILL_TABLE.species},"
+                " replaced by 'horse'"
+            )
+            codes[unknown] = HILL_TABLE.code("horse")
+        return codes
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "GasBatch":
+        """
+        Build a GasBatch from a DataFrame (one row per gas, vectorized).
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            the measured values (missing columns -> GasBatch.defaults, the
+            other columns are ignored).
+
+        Returns
+        -------
+        GasBatch
+            the gases.
+        """
+        dico: dict[str, Any] = {}
+        for key in ["spec"] + cls.fields:
+            if key in df.columns:
+                dico[key] = df[key].to_numpy()
+        if len(df) and not dico:
+            dico["hb"] = np.full(len(df), cls.defaults["hb"])
+        batch = cls(**dico)
+        logging.info(f"built a GasBatch of {len(batch)} gases from {list(dico)}")
+        return batch
+
+    @classmethod
+    def from_gases(cls, gases: list[Any]) -> "GasBatch":
+        """Build a GasBatch from a list of Gas objects."""
+        dico = {"spec": [gas.spec for gas in gases]}
+        for key in cls.fields:
+            dico[key] = [getattr(gas, key) for gas in gases]
+        return cls(**dico)
+
+    def _take(self, index: Any) -> "GasBatch":
+        """Return a new GasBatch containing the selected gases (copy)."""
+        batch = object.__new__(type(self))
+        batch.spec_code = self.spec_code[index]
+        for key in self.fields:
+            setattr(batch, key, getattr(self, key)[index])
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.spec_code)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError(f"{index=} out of range ({len(self)} gases)")
+            return GasView(self, int(index))
+        return self._take(index)
+
+    def __iter__(self) -> Any:
+        for i in range(len(self)):
+            yield GasView(self, i)
+
+    def __str__(self) -> str:
+        """Str description."""
+        return f"GasBatch of {len(self)} gases \n {self.to_frame()}"
+
+    @property
+    def spec(self) -> np.ndarray:
+        """Return the species names."""
+        return np.asarray(HILL_TABLE.species)[self.spec_code]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return a DataFrame of the measured values."""
+        dico = {"spec": self.spec}
+        for key in self.fields:
+            dico[key] = getattr(self, key)
+        return pd.DataFrame(dico)
+
+    def to_gases(self) -> list[Gas]:
+        """Return a list of (independant) Gas objects."""
+        return [Gas(**view.values(), etco2=view.etco2) for view in self]
+
+    def casc(self) -> np.ndarray:
+        """
+        Compute the O2 cascade for all the gases.
+
+        Returns
+        -------
+        np.ndarray
+            shape (n, 4), columns (pinsp, paerien, pAo2 and paO2)
+        """
+        ph2o = 47
+        patm = 760
+        casc = np.empty((len(self), 4))
+        casc[:, 0] = self.fio2 * patm
+        casc[:, 1] = self.fio2 * (patm - ph2o)
+        casc[:, 2] = casc[:, 1] - self.pco2 / 0.8
+        casc[:, 3] = self.po2
+        return casc
+
+    def piecasc(self) -> list[dict[str, np.ndarray]]:
+        """
+        Compute the O2 cascade values for all the gases.
+
+        Returns
+        -------
+        list[dict[str, np.ndarray]]
+            [inspired, aerial, alveolar] (cf Gas.piecasc), one value per gas
+        """
         ph2o = 47
         patm = 760
         inspired = {}
@@ -161,21 +628,216 @@ class Gas:
 
         aerial = {}
         aerial["O2"] = self.fio2 * (patm - ph2o)
-        aerial["H2O"] = ph2o
+        aerial["H2O"] = np.full(len(self), float(ph2o))
         aerial["N2"] = patm - aerial["O2"] - aerial["H2O"]
 
         alveolar = {}
         alveolar["O2"] = self.fio2 * (patm - ph2o) - self.pco2 / 0.8
-        alveolar["H2O"] = ph2o
-        alveolar["CO2"] = self.pco2
+        alveolar["H2O"] = np.full(len(self), float(ph2o))
+        alveolar["CO2"] = self.pco2.copy()
         alveolar["N2"] = patm - alveolar["O2"] - ph2o - self.pco2
 
         pieCas = [inspired, aerial, alveolar]
         return pieCas
 
+    def sat(self, dtype: Any = np.float64) -> np.ndarray:
+        """Return the satHbO2 values of all the gases (cf satHbO2_array)."""
+        return satHbO2_array(self.spec_code, self.po2, dtype)
+
+    def cao2(self, dtype: Any = np.float64) -> np.ndarray:
+        """Return the caO2 values of all the gases (cf caO2_array)."""
+        return caO2_array(self.spec_code, self.hb, self.po2, dtype)
+
+
+def _batch_property(key: str) -> property:
+    """Build a property reading/writing the 'key' column of a GasBatch row."""
+
+    def getter(self: "GasView") -> float:
+        return getattr(self._batch, key)[self._index].item()
+
+    def setter(self: "GasView", value: float) -> None:
+        getattr(self._batch, key)[self._index] = value
+
+    return property(getter, setter)
+
+
+class GasView(Gas):
+    """
+    A Gas whose values are read (and written) in a GasBatch row.
+
+    NB not registered in GAS_REGISTRY, and not cached (the batch columns can be
+    modified directly).
+    """
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: GasBatch, index: int) -> None:
+        self._batch = batch
+        self._index = index
+
+    def _cached(self, key: str, func: Callable) -> Any:
+        return func()
+
+    @property  # type: ignore[override]
+    def spec(self) -> str:
+        """Species name."""
+        return HILL_TABLE.species[self._batch.spec_code[self._index]]
+
+    @spec.setter
+    def spec(self, value: str) -> None:
+        self._batch.spec_code[self._index] = self._batch.encode_species(value)
+
+    hb = _batch_property("hb")
+    fio2 = _batch_property("fio2")
+    po2 = _batch_property("po2")
+    ph = _batch_property("ph")
+    pco2 = _batch_property("pco2")
+    hco3 = _batch_property("hco3")
+    etco2 = _batch_property("etco2")
+
 
 # ==============================================================================
 # hill function parameters
+class HillTable:
+    """
+    Immutable table of the hill function parameters (one row per species).
+
+    + HillTable(species=['horse', 'dog'], params={'base': [2, 6.9], 'max': ...})
+
+    + attributes :
+        species : tuple of species names (the position is the species code) \
+        array : read-only array, shape (n_species, 4), columns in fields order \
+        base, max, rate, xhalf : read-only columns of array \
+    + methods :
+        code : return the code of a species (O(1) dict lookup) \
+        codes : return the codes of an array of species names (-1 if unknown) \
+        params : return the parameters dictionary of a species \
+        with_species : return a new table with an added (or replaced) species \
+
+    NB use register_species() to extend the module level HILL_TABLE.
+    """
+
+    fields = ("base", "max", "rate", "xhalf")
+
+    def __init__(self, species: Any, params: dict[str, Any]) -> None:
+        array = np.column_stack(
+            [np.asarray(params[key], dtype=float) for key in self.fields]
+        )
+        if array.shape[0] != len(species):
+            raise ValueError(f"{len(species)} species for {array.shape[0]} rows")
+        array.flags.writeable = False
+        object.__setattr__(self, "species", tuple(species))
+        object.__setattr__(self, "array", array)
+        object.__setattr__(self, "_codes", {n: i for i, n in enumerate(species)})
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getattr__(self, key: str) -> np.ndarray:
+        # columns access (base, max, rate, xhalf)
+        if key in HillTable.fields:
+            return self.array[:, HillTable.fields.index(key)]
+        raise AttributeError(key)
+
+    def __contains__(self, species: str) -> bool:
+        return species in self._codes
+
+    def __len__(self) -> int:
+        return len(self.species)
+
+    def code(self, species: str) -> int:
+        """Return the species code (KeyError if unknown)."""
+        return self._codes[species]
+
+    def codes(self, names: Any) -> np.ndarray:
+        """Return the species codes of an array of names (-1 if unknown)."""
+        names = np.asarray(names, dtype=str)
+        codes = np.full(names.shape, -1, dtype=np.int8)
+        for code, name in enumerate(self.species):
+            codes[names == name] = code
+        return codes
+
+    def params(self, species: str) -> dict[str, float]:
+        """Return the hill parameters of a species (KeyError if unknown)."""
+        row = self.array[self._codes[species]]
+        return dict(zip(self.fields, row.tolist()))
+
+    def with_species(self, species: str, hill_params: dict[str, float]) -> "HillTable":
+        """
+        Return a new table containing the species.
+
+        Parameters
+        ----------
+        species : str
+            the species name (if already present, its parameters are replaced
+            and its code is preserved).
+        hill_params : dict[str, float]
+            keys : 'base', 'max', 'rate', 'xhalf'
+
+        Returns
+        -------
+        HillTable
+            the new table.
+        """
+        missing = [key for key in self.fields if key not in hill_params]
+        if missing:
+            raise ValueError(f"{missing=} in hill_params")
+        row = [float(hill_params[key]) for key in self.fields]
+        array = self.array.copy()
+        names = list(self.species)
+        if species in self._codes:
+            array[self._codes[species]] = row
+        else:
+            names.append(species)
+            array = np.vstack([array, row])
+        return HillTable(names, dict(zip(self.fields, array.T)))
+
+
+# built once at import
+# sat_curv['horse'] = ([2, 99.427, 2.7, 23.8])
+HILL_TABLE = HillTable(
+    species=["horse", "dog", "cat", "human"],
+    params={
+        "base": [2, 6.9, 0, 0],
+        "max": [99.427, 100, 100, 100],
+        "rate": [2.7, 2.8, 2, 2.8],
+        "xhalf": [23.8, 33.3, 0, 0],
+    },
+)
+
+
+def register_species(species: str, hill_params: dict[str, float]) -> int:
+    """
+    Add (or update) a species in the hill parameters table.
+
+    Parameters
+    ----------
+    species : str
+        the species name.
+    hill_params : dict[str, float]
+        keys : 'base', 'max', 'rate', 'xhalf'
+
+    Returns
+    -------
+    int
+        the species code.
+    """
+    global HILL_TABLE
+    HILL_TABLE = HILL_TABLE.with_species(species, hill_params)
+    logging.info(f"registered {species=} {hill_params=}")
+    return HILL_TABLE.code(species)
+
+
+def species_code(species: str) -> int:
+    """Return the species code, unknown species are replaced by 'horse'."""
+    try:
+        return HILL_TABLE.code(species)
+    except KeyError:
+        print(f"species should be in {list(HILL_TABLE.species)}")
+        logging.warning(f"{species=}, replaced by 'horse")
+        return HILL_TABLE.code("horse")
+
+
 def satFit(species: str) -> dict[str, Any]:
     """
     Return hill function parameters to be able to rebuild saturation curve.
@@ -183,7 +845,7 @@ def satFit(species: str) -> dict[str, Any]:
     Parameters
     ----------
     species : str
-        species in ["horse", "dog", "cat", "human"]
+        species in HILL_TABLE.species (["horse", "dog", "cat", "human"] + registered)
 
     Returns
     -------
@@ -191,23 +853,8 @@ def satFit(species: str) -> dict[str, Any]:
         keys : 'base', 'max', 'rate', 'xhalf'
 
     """
-    species_list = ["horse", "dog", "cat", "human"]
-    if species not in species_list:
-        print(f"species should be in {species_list}")
-        logging.warning(f"{species=}, replaced by 'horse")
-        species = "horse"
-    sat_curv: dict[str, list[Any]] = {}
-    sat_curv["id"] = species_list
-    # sat_curv['horse'] = ([2, 99.427, 2.7, 23.8])
-    sat_curv["base"] = [2, 6.9, 0, 0]
-    sat_curv["max"] = [99.427, 100, 100, 100]
-    sat_curv["rate"] = [2.7, 2.8, 2, 2.8]
-    sat_curv["xhalf"] = [23.8, 33.3, 0, 0]
-
-    hillparams_df = pd.DataFrame(sat_curv).set_index("id").T
-    hillparams = hillparams_df[species].to_dict()
-
-    return hillparams
+    table = HILL_TABLE
+    return dict(zip(table.fields, table.array[species_code(species)].tolist()))
 
 
 # TODO check with previous values
@@ -226,6 +873,7 @@ def satFit(species: str) -> dict[str, Any]:
 #    	rate 	=2.8702 ± 0.00521
 #    	xhalf	=33.263 ± 0.037
 
+
 # --------------------------------------
 def satHbO2(
     species: str, po2: float
@@ -236,7 +884,7 @@ def satHbO2(
     Parameters
     ----------
     species : str
-        in [horse, dog, cat, human]
+        in HILL_TABLE.species ([horse, dog, cat, human] + registered)
     po2: float
         the arterial oxygen value
     Returns
@@ -246,10 +894,8 @@ def satHbO2(
     """
     #    species = mes['species']
     #    po2 = mes['po2']
-    hill_params = satFit(species)
-    sat = hill_params["base"] + (hill_params["max"] - hill_params["base"]) / (
-        1 + ((hill_params["xhalf"] / po2) ** hill_params["rate"])
-    )
+    base, top, rate, xhalf = HILL_TABLE.array[species_code(species)]
+    sat = base + (top - base) / (1 + ((xhalf / po2) ** rate))
     # if (sat > 100):
     #  sat = 100
     return sat
@@ -262,7 +908,7 @@ def caO2(species: str, hb: float, po2: float) -> float:
     Parameters
     ----------
     species : str
-        in [horse, dog, cat, human].
+        in HILL_TABLE.species ([horse, dog, cat, human] + registered).
     hb : float
         the Hb content.
     po2 : float
@@ -281,143 +927,1082 @@ def caO2(species: str, hb: float, po2: float) -> float:
     return cao2
 
 
-# %
-def plot_acidbas(
-    gases: list,
-    num: int,
-    savedir: Optional[str] = None,
-    ident: str = "",
-    saveit: bool = False,
-    pyplot: bool = True,
-) -> plt.Figure:
+def as_species_codes(spec: Any) -> np.ndarray:
     """
-    Plot the acid-base analysis.
+    Return species codes from codes or names.
 
     Parameters
     ----------
-    gases : list
-        list of bg.Gas objects
-    num : int
-        location in the list.
-    savedir : str
-        path to save.
-    ident : str, optional (default is "")
-        string to identify in the save name.
-    saveit : bool, optional (default is False)
-        to save or not to save
-    pyplot : bool, optional (default is False)
-        True: return a pyplot,    else a Figure obj
+    spec : int, str or array like
+        species codes (index in HILL_TABLE.species) or species names
+        (unknown names are replaced by 'horse').
 
     Returns
     -------
-    fig : plt.Figure or matplotlib.Figure
-        the plot
+    np.ndarray
+        the species codes.
     """
-    if savedir is None:
-        savedir = os.path.expanduser("~")
-    gas = gases[num]
-    species = gas.spec
-    if species == "horse":
-        phRange = [7.35, 7.45]
-    else:
-        phRange = [7.35, 7.42]
-    ph = gas.ph
-    pco2 = gas.pco2
-    hco3 = gas.hco3
+    spec = np.asarray(spec)
+    if spec.dtype.kind in "USO":
+        return GasBatch.encode_species(spec)
+    return spec.astype(np.intp, copy=False)
 
-    if pyplot:
-        fig, axes = plt.subplots(nrows=3, ncols=1, figsize=(14, 8), frameon=True)
-    else:
-        fig = Figure(figsize=(14, 8), frameon=True)
-        axes = []
-        for i in range(1, 4):
-            axes.append(fig.add_subplot(3, 1, i))
-    # fig.suptitle("acidobasique ($pH, \ Pa_{CO_2}, \ HCO_3^-$ )", fontsize=24,
-    #              color='tab:gray')
-    legs = [(r"$pH$", "k"), (r"$P_{CO_2}$", "tab:blue"), (r"$HCO_3^-$", "tab:orange")]
-    for ax, leg in zip(axes, legs):
-        ax.axhline(0, color="tab:gray")
-        ax.text(
-            0.05,
-            0.5,
-            leg[0],
-            fontsize=22,
-            color=leg[1],
-            horizontalalignment="left",
-            verticalalignment="center",
-            transform=ax.transAxes,
-            backgroundcolor="w",
-        )
-    txt = f"acid {'-' * 76} alcalin"
-    fig.suptitle(txt, color="tab:gray")
-    ax = axes[0]
-    ax.xaxis.set_major_formatter(FormatStrFormatter("%.2f"))
-    ax.plot(
-        phRange,
-        [0, 0],
-        label="line 1",
-        linewidth=5,
-        color="tab:gray",
-        marker="d",
-        markersize=10,
-    )
-    ax.plot([ph], [0], "v-", color="tab:red", markersize=32, markeredgecolor="k")
-    phmin, phmax = 7.3, 7.5
-    if ph >= 7.5:
-        phmax = ph + 0.1
-    if ph <= 7.3:
-        phmin = ph - 0.1
-    ax.set_xlim([phmin, phmax])
-
-    ax = axes[1]
-    co2min, co2max = 25, 55
-    if pco2 >= co2max:
-        co2max = pco2 + 5
-    if pco2 <= co2min:
-        co2min = pco2 - 5
-    ax.plot(
-        [35, 45],
-        [0, 0],
-        label="line 1",
-        linewidth=5,
-        color="tab:blue",
-        alpha=0.8,
-        marker="d",
-        markersize=10,
-    )
-    ax.plot([pco2], [0], "v-", color="tab:red", markersize=32, markeredgecolor="k")
-    ax.set_xlim([co2max, co2min])
-
-    ax = axes[2]
-    hco3min, hco3max = 15, 35
-    if hco3 >= hco3max:
-        hco3max = hco3 + 5
-    if hco3 <= hco3min:
-        hco3min = hco3 - 5
-    ax.plot(
-        [20, 30],
-        [0, 0],
-        label="line 1",
-        linewidth=5,
-        color="tab:orange",
-        marker="d",
-        markersize=10,
+
+def _hill_params(spec: Any, po2: Any, dtype: np.dtype) -> tuple[np.ndarray, ...]:
+    """
+    Return the broadcasted po2 and hill parameters of the species.
+
+    (po2, base, top, rate, xhalf / po2), xhalf / po2 is NaN for a NaN po2,
+    a po2 <= 0 or an unknown species code (cf satHbO2_array, dsatHbO2_array).
+    """
+    codes = as_species_codes(spec)
+    codes, po2 = np.broadcast_arrays(codes, np.asarray(po2, dtype=dtype))
+    table = HILL_TABLE.array.astype(dtype, copy=False)
+    known = (codes >= 0) & (codes < len(table))
+    params = table[np.where(known, codes, 0)]
+    base, top, rate, xhalf = np.moveaxis(params, -1, 0)
+    valid = known & (po2 > 0)
+    ratio = np.divide(xhalf, po2, out=np.full(po2.shape, np.nan, dtype), where=valid)
+    return po2, base, top, rate, ratio
+
+
+def satHbO2_array(spec: Any, po2: Any, dtype: Any = np.float64) -> np.ndarray:
+    """
+    Return the satHbO2 values for arrays of species and po2 (broadcasted).
+
+    Parameters
+    ----------
+    spec : int, str or array like
+        species codes (index in HILL_TABLE.species) or species names.
+    po2 : float or array like
+        the arterial oxygen values (mmHg).
+    dtype : numpy dtype, optional (default is np.float64)
+        dtype of the computation and of the result (np.float32 or np.float64).
+
+    Returns
+    -------
+    np.ndarray
+        the sat values (NaN for a NaN po2, a po2 <= 0 or an unknown code).
+    """
+    dtype = np.dtype(dtype)
+    po2, base, top, rate, ratio = _hill_params(spec, po2, dtype)
+    with np.errstate(over="ignore"):
+        # very low po2 : ratio ** rate -> inf and sat -> base
+        sat = base + (top - base) / (1 + ratio**rate)
+    return sat.astype(dtype, copy=False)
+
+
+def caO2_array(spec: Any, hb: Any, po2: Any, dtype: Any = np.float64) -> np.ndarray:
+    """
+    Return the arterial contents in oxygen for arrays (broadcasted).
+
+    Parameters
+    ----------
+    spec : int, str or array like
+        species codes (index in HILL_TABLE.species) or species names.
+    hb : float or array like
+        the Hb contents.
+    po2 : float or array like
+        the arterial oxygen values (mmHg).
+    dtype : numpy dtype, optional (default is np.float64)
+        dtype of the computation and of the result (np.float32 or np.float64).
+
+    Returns
+    -------
+    np.ndarray
+        the caO2 values (NaN where satHbO2_array is NaN).
+    """
+    dtype = np.dtype(dtype)
+    po2 = np.asarray(po2, dtype=dtype)
+    sat = satHbO2_array(spec, po2, dtype)
+    hb = np.asarray(hb, dtype=dtype)
+    cao2 = dtype.type(1.38) * sat * hb + dtype.type(0.003) * po2
+    return cao2.astype(dtype, copy=False)
+
+
+def dsatHbO2_array(spec: Any, po2: Any, dtype: Any = np.float64) -> np.ndarray:
+    """
+    Return the satHbO2 slope (dSat/dPO2 in %/mmHg) for arrays (broadcasted).
+
+    closed form derivative of the hill function:
+    dSat/dPO2 = (max - base) * rate * s * (1 - s) / po2,
+    with s = 1 / (1 + (xhalf/po2)**rate)
+
+    Parameters
+    ----------
+    spec : int, str or array like
+        species codes (index in HILL_TABLE.species) or species names.
+    po2 : float or array like
+        the arterial oxygen values (mmHg).
+    dtype : numpy dtype, optional (default is np.float64)
+        dtype of the computation and of the result (np.float32 or np.float64).
+
+    Returns
+    -------
+    np.ndarray
+        the slopes (NaN for a NaN po2, a po2 <= 0 or an unknown code).
+    """
+    dtype = np.dtype(dtype)
+    po2, base, top, rate, ratio = _hill_params(spec, po2, dtype)
+    with np.errstate(over="ignore", invalid="ignore"):
+        powered = ratio**rate
+        s = 1 / (1 + powered)
+        # s * (1 - s) loses precision when powered is small
+        frac = np.where(powered > 1, s * (1 - s), powered * s * s)
+        slope = (top - base) * rate * frac / po2
+    return slope.astype(dtype, copy=False)
+
+
+def dcaO2_dpo2(spec: Any, hb: Any, po2: Any, dtype: Any = np.float64) -> np.ndarray:
+    """
+    Return the caO2 slope (dCaO2/dPO2 in ml/l/mmHg) for arrays (broadcasted).
+
+    dCaO2/dPO2 = 1.38 * hb * dSat/dPO2 + 0.003
+
+    Parameters
+    ----------
+    spec : int, str or array like
+        species codes (index in HILL_TABLE.species) or species names.
+    hb : float or array like
+        the Hb contents.
+    po2 : float or array like
+        the arterial oxygen values (mmHg).
+    dtype : numpy dtype, optional (default is np.float64)
+        dtype of the computation and of the result (np.float32 or np.float64).
+
+    Returns
+    -------
+    np.ndarray
+        the slopes (NaN where dsatHbO2_array is NaN).
+    """
+    dtype = np.dtype(dtype)
+    dsat = dsatHbO2_array(spec, po2, dtype)
+    hb = np.asarray(hb, dtype=dtype)
+    slope = dtype.type(1.38) * hb * dsat + dtype.type(0.003)
+    return slope.astype(dtype, copy=False)
+
+
+def max_dsatHbO2(spec: Any) -> np.ndarray:
+    """
+    Return the maximal satHbO2 slope (at the inflection point of the curve).
+
+    the inflection point is at po2 = xhalf * ((rate - 1) / (rate + 1))**(1 / rate)
+
+    Parameters
+    ----------
+    spec : int, str or array like
+        species codes (index in HILL_TABLE.species) or species names.
+
+    Returns
+    -------
+    np.ndarray
+        the maximal slopes (%/mmHg, 0 for a flat curve).
+    """
+    codes = as_species_codes(spec)
+    known = (codes >= 0) & (codes < len(HILL_TABLE))
+    params = HILL_TABLE.array[np.where(known, codes, 0)]
+    _, _, rate, xhalf = np.moveaxis(params, -1, 0)
+    shape = np.clip((rate - 1) / (rate + 1), 0, None) ** (1 / rate)
+    slope = np.nan_to_num(dsatHbO2_array(codes, xhalf * shape))
+    return np.where(known, slope, np.nan)
+
+
+def cao2_sensitivity(gases: Any, dtype: Any = np.float64) -> pd.DataFrame:
+    """
+    Locate each gas on its oxygen dissociation curve.
+
+    Parameters
+    ----------
+    gases : GasBatch or list
+        the gases (a list of Gas objects is converted to a GasBatch).
+    dtype : numpy dtype, optional (default is np.float64)
+        dtype of the computation.
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per gas, columns :
+            spec, po2, hb,
+            sat : satHbO2 (%),
+            dsat_dpo2 : satHbO2 slope (%/mmHg),
+            cao2 : oxygen content (ml/l),
+            dcao2_dpo2 : caO2 slope (ml/l/mmHg),
+            slope_ratio : dsat_dpo2 / maximal slope of the species curve
+                (~1 on the steep part, ~0 on the plateau)
+    """
+    if not isinstance(gases, GasBatch):
+        gases = GasBatch.from_gases(gases)
+    codes = gases.spec_code
+    dsat = dsatHbO2_array(codes, gases.po2, dtype)
+    max_slope = max_dsatHbO2(codes).astype(dtype)
+    ratio = np.divide(
+        dsat, max_slope, out=np.full(dsat.shape, np.nan, dtype), where=max_slope > 0
+    )
+    return pd.DataFrame(
+        {
+            "spec": gases.spec,
+            "po2": gases.po2,
+            "hb": gases.hb,
+            "sat": satHbO2_array(codes, gases.po2, dtype),
+            "dsat_dpo2": dsat,
+            "cao2": caO2_array(codes, gases.hb, gases.po2, dtype),
+            "dcao2_dpo2": dcaO2_dpo2(codes, gases.hb, gases.po2, dtype),
+            "slope_ratio": ratio,
+        }
     )
-    ax.plot([hco3], [0], "v-", color="tab:red", markersize=32, markeredgecolor="k")
-    ax.set_xlim([hco3min, hco3max])
-    for ax in axes:
+
+
+# --------------------------------------
+# derived indices (compute only, cf the plot functions)
+def derived_indices(gases: Any, dtype: Any = np.float64) -> pd.DataFrame:
+    """
+    Compute all the clinical indices of a set of gases in one vectorized pass.
+
+    Parameters
+    ----------
+    gases : GasBatch or list
+        the gases (a list of Gas objects is converted to a GasBatch).
+    dtype : numpy dtype, optional (default is np.float64)
+        dtype of the oxygen computations.
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per gas, columns :
+            spec,
+            pinsp, paerial, pAo2, pao2 : O2 cascade (mmHg, cf Gas.casc),
+            gAa : alveolo-arterial gradient (pAo2 - pao2, mmHg),
+            ratio : pao2 / fio2,
+            sat : satHbO2 (%),
+            cao2 : oxygen content (ml/l),
+            dcao2_dpo2 : caO2 slope (ml/l/mmHg),
+            ph_code, pco2_code, hco3_code : morpion classes (cf morpion_codes)
+    """
+    if not isinstance(gases, GasBatch):
+        gases = GasBatch.from_gases(gases)
+    codes = gases.spec_code
+    casc = gases.casc()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = gases.po2 / gases.fio2
+    indices = pd.DataFrame(
+        {
+            "spec": gases.spec,
+            "pinsp": casc[:, 0],
+            "paerial": casc[:, 1],
+            "pAo2": casc[:, 2],
+            "pao2": casc[:, 3],
+            "gAa": casc[:, 2] - casc[:, 3],
+            "ratio": ratio,
+            "sat": satHbO2_array(codes, gases.po2, dtype),
+            "cao2": caO2_array(codes, gases.hb, gases.po2, dtype),
+            "dcao2_dpo2": dcaO2_dpo2(codes, gases.hb, gases.po2, dtype),
+        }
+    )
+    morpion = classify_acidbase(gases)
+    for key in morpion.columns:
+        indices[key + "_code"] = morpion[key].to_numpy()
+    return indices
+
+
+def gas_indices(gases: Any, num: int) -> pd.Series:
+    """Return the derived indices of the gas at location 'num' (cf derived_indices)."""
+    return derived_indices([gases[num]]).iloc[0]
+
+
+# --------------------------------------
+# oxygen dissociation lookup tables (opt-in, cf use_sat_lookup)
+class SatLookup:
+    """
+    Precomputed oxygen dissociation tables for all the HILL_TABLE species.
+
+    + SatLookup(po2_min=1, po2_max=800, step=0.1)
+
+    + attributes :
+        grid : the po2 grid (mmHg) \
+        sat_table : satHbO2 values, shape (n_species, len(grid)) \
+        dsat_table : dSat/dPO2 values, shape (n_species, len(grid)) \
+        hill_table : the HillTable used to build the tables \
+    + methods :
+        sat : satHbO2 by interpolation ('linear' or 'cubic') \
+        dsat : dSat/dPO2 by interpolation ('linear' or 'cubic') \
+        max_error : the measured maximal error against the closed form \
+
+    'cubic' is a cubic Hermite interpolation using the stored derivatives.
+    Error bounds against satHbO2 (h = step, f = satHbO2):
+        linear : |err| <= h**2 / 8 * max|f''|
+        cubic : |err| <= h**4 / 384 * max|f''''|
+    measured with the default grid (step = 0.1 mmHg, horse & dog), max_error():
+        sat : linear 3.5e-4 %, cubic 4.6e-9 %
+        dsat : linear 7.4e-5 %/mmHg, cubic 1.1e-9 %/mmHg
+    Values outside [po2_min, po2_max] are computed with the closed form.
+    NB not faster than the vectorized closed form (satHbO2_array), measured
+    with benchmark_sat_lookup (best of 5, mixed horse & dog):
+        10**5 points : closed 3.0 ms, linear 4.2 ms, cubic 6.9 ms
+        10**6 points : closed 53 ms, linear 53 ms, cubic 90 ms
+    the tables are kept as an option (fixed grid, configurable accuracy),
+    the plots use the closed form unless use_sat_lookup() is called.
+    """
+
+    def __init__(
+        self, po2_min: float = 1, po2_max: float = 800, step: float = 0.1
+    ) -> None:
+        self.hill_table = HILL_TABLE
+        self.po2_min = float(po2_min)
+        self.step = float(step)
+        size = int(round((po2_max - po2_min) / step)) + 1
+        self.grid = self.po2_min + self.step * np.arange(size)
+        self.po2_max = float(self.grid[-1])
+        codes = np.arange(len(self.hill_table))[:, np.newaxis]
+        self.sat_table = satHbO2_array(codes, self.grid)
+        self.dsat_table = dsatHbO2_array(codes, self.grid)
+
+    def _locate(self, spec: Any, po2: Any) -> tuple[Any, ...]:
+        """
+        Return codes, po2, inside mask, left node index and position in cell.
+
+        (flattened, the broadcasted shape is returned last)
+        """
+        codes = as_species_codes(spec)
+        codes, po2 = np.broadcast_arrays(codes, np.asarray(po2, dtype=float))
+        shape = po2.shape
+        # 1d to be able to assign the out of grid values (scalars included)
+        codes, po2 = codes.ravel(), po2.ravel()
+        pos = (po2 - self.po2_min) / self.step
+        inside = (
+            (pos >= 0)
+            & (pos <= len(self.grid) - 1)
+            & (codes >= 0)
+            & (codes < len(self.sat_table))
+        )
+        pos = np.where(inside, pos, 0.0)
+        left = np.minimum(pos.astype(np.intp), len(self.grid) - 2)
+        return codes, po2, inside, left, pos - left, shape
+
+    def _nodes(self, codes: np.ndarray, inside: np.ndarray, left: np.ndarray) -> Any:
+        """Return the sat & dsat values at the cell nodes."""
+        rows = np.where(inside, codes, 0)
+        sat0 = self.sat_table[rows, left]
+        sat1 = self.sat_table[rows, left + 1]
+        dsat0 = self.dsat_table[rows, left]
+        dsat1 = self.dsat_table[rows, left + 1]
+        return sat0, sat1, dsat0, dsat1
+
+    def sat(
+        self, spec: Any, po2: Any, mode: str = "cubic", dtype: Any = np.float64
+    ) -> np.ndarray:
+        """
+        Return satHbO2 by interpolation in the tables.
+
+        Parameters
+        ----------
+        spec : int, str or array like
+            species codes (index in HILL_TABLE.species) or species names.
+        po2 : float or array like
+            the arterial oxygen values (mmHg).
+        mode : str, optional (default is "cubic")
+            interpolation in ['linear', 'cubic'].
+        dtype : numpy dtype, optional (default is np.float64)
+            dtype of the result.
+
+        Returns
+        -------
+        np.ndarray
+            the sat values (cf satHbO2_array).
+        """
+        codes, po2, inside, left, t, shape = self._locate(spec, po2)
+        sat0, sat1, dsat0, dsat1 = self._nodes(codes, inside, left)
+        if mode == "linear":
+            sat = sat0 + t * (sat1 - sat0)
+        elif mode == "cubic":
+            t2 = t * t
+            t3 = t2 * t
+            sat = (
+                (2 * t3 - 3 * t2 + 1) * sat0
+                + (t3 - 2 * t2 + t) * self.step * dsat0
+                + (3 * t2 - 2 * t3) * sat1
+                + (t3 - t2) * self.step * dsat1
+            )
+        else:
+            raise ValueError(f"{mode=} should be in ['linear', 'cubic']")
+        if not inside.all():
+            sat[~inside] = satHbO2_array(codes[~inside], po2[~inside])
+        return sat.reshape(shape).astype(dtype, copy=False)
+
+    def dsat(
+        self, spec: Any, po2: Any, mode: str = "cubic", dtype: Any = np.float64
+    ) -> np.ndarray:
+        """
+        Return dSat/dPO2 by interpolation in the tables.
+
+        Parameters
+        ----------
+        spec : int, str or array like
+            species codes (index in HILL_TABLE.species) or species names.
+        po2 : float or array like
+            the arterial oxygen values (mmHg).
+        mode : str, optional (default is "cubic")
+            interpolation in ['linear', 'cubic'].
+        dtype : numpy dtype, optional (default is np.float64)
+            dtype of the result.
+
+        Returns
+        -------
+        np.ndarray
+            the slopes (cf dsatHbO2_array).
+        """
+        codes, po2, inside, left, t, shape = self._locate(spec, po2)
+        sat0, sat1, dsat0, dsat1 = self._nodes(codes, inside, left)
+        if mode == "linear":
+            dsat = dsat0 + t * (dsat1 - dsat0)
+        elif mode == "cubic":
+            # derivative of the cubic Hermite polynomial
+            t2 = t * t
+            dsat = (
+                (6 * t2 - 6 * t) * (sat0 - sat1) / self.step
+                + (3 * t2 - 4 * t + 1) * dsat0
+                + (3 * t2 - 2 * t) * dsat1
+            )
+        else:
+            raise ValueError(f"{mode=} should be in ['linear', 'cubic']")
+        if not inside.all():
+            dsat[~inside] = dsatHbO2_array(codes[~inside], po2[~inside])
+        return dsat.reshape(shape).astype(dtype, copy=False)
+
+    def max_error(self, mode: str = "cubic", kind: str = "sat") -> float:
+        """
+        Return the maximal absolute error against the closed form.
+
+        (measured in the middle of the grid cells)
+
+        Parameters
+        ----------
+        mode : str, optional (default is "cubic")
+            interpolation in ['linear', 'cubic'].
+        kind : str, optional (default is "sat")
+            'sat' or 'dsat'.
+
+        Returns
+        -------
+        float
+            the maximal absolute error (% or %/mmHg).
+        """
+        codes = np.arange(len(self.hill_table))[:, np.newaxis]
+        middles = self.grid[:-1] + self.step / 2
+        if kind == "sat":
+            approx = self.sat(codes, middles, mode)
+            exact = satHbO2_array(codes, middles)
+        else:
+            approx = self.dsat(codes, middles, mode)
+            exact = dsatHbO2_array(codes, middles)
+        return float(np.nanmax(np.abs(approx - exact)))
+
+
+_SAT_LOOKUP: Optional[SatLookup] = None
+
+
+def use_sat_lookup(enable: bool = True, **kwargs: Any) -> Optional[SatLookup]:
+    """
+    Enable (or disable) the lookup tables for the curve plots.
+
+    (disabled by default, the tables are not faster than the closed form,
+    cf SatLookup)
+
+    Parameters
+    ----------
+    enable : bool, optional (default is True)
+        True to use the precomputed tables, False for the closed form.
+    **kwargs :
+        SatLookup parameters (po2_min, po2_max, step).
+
+    Returns
+    -------
+    Optional[SatLookup]
+        the lookup engine (None if disabled).
+    """
+    global _SAT_LOOKUP
+    _SAT_LOOKUP = SatLookup(**kwargs) if enable else None
+    return _SAT_LOOKUP
+
+
+def get_sat_lookup() -> Optional[SatLookup]:
+    """Return the enabled lookup engine (rebuilt if HILL_TABLE changed)."""
+    global _SAT_LOOKUP
+    lookup = _SAT_LOOKUP
+    if lookup is not None and lookup.hill_table is not HILL_TABLE:
+        lookup = SatLookup(lookup.po2_min, lookup.po2_max, lookup.step)
+        _SAT_LOOKUP = lookup
+    return lookup
+
+
+def sat_curve(species: str, po2: Any) -> Any:
+    """Return satHbO2 along a po2 range (lookup tables if enabled)."""
+    lookup = get_sat_lookup()
+    if lookup is None:
+        return satHbO2(species, po2)
+    return lookup.sat(species_code(species), po2)
+
+
+def caO2_curve(species: str, hb: Any, po2: Any) -> Any:
+    """Return caO2 along a po2 range (lookup tables if enabled)."""
+    return 1.38 * sat_curve(species, po2) * hb + 0.003 * np.asarray(po2)
+
+
+def caO2_grid(species: str, hb: Any, po2: Any) -> np.ndarray:
+    """
+    Return the caO2 surface over a Hb x po2 grid.
+
+    (the saturation is computed once along po2 and broadcasted against hb)
+
+    Parameters
+    ----------
+    species : str
+        in HILL_TABLE.species.
+    hb : float or array like
+        the Hb contents (any resolution).
+    po2 : float or array like
+        the oxygen partial pressures (mmHg).
+
+    Returns
+    -------
+    np.ndarray
+        caO2 (ml/l), shape (len(hb), len(po2)).
+    """
+    po2 = np.atleast_1d(np.asarray(po2, dtype=float))
+    hb = np.atleast_1d(np.asarray(hb, dtype=float))
+    sat = np.asarray(sat_curve(species, po2))
+    return 1.38 * hb[:, np.newaxis] * sat[np.newaxis, :] + 0.003 * po2
+
+
+def benchmark_sat_lookup(
+    sizes: Optional[list[int]] = None, repeat: int = 3, lookup: Any = None
+) -> pd.DataFrame:
+    """
+    Compare the closed form and the lookup tables (mixed horse/dog values).
+
+    Parameters
+    ----------
+    sizes : list[int], optional (default is 10**3 to 10**7)
+        number of points.
+    repeat : int, optional (default is 3)
+        the best of 'repeat' runs is kept.
+    lookup : SatLookup, optional (default is None)
+        the engine to test (a default SatLookup if None).
+
+    Returns
+    -------
+    pd.DataFrame
+        timings (s) and maximal absolute errors (%), one row per size.
+    """
+    if sizes is None:
+        sizes = [10**3, 10**4, 10**5, 10**6, 10**7]
+    if lookup is None:
+        lookup = SatLookup()
+    rng = np.random.default_rng(0)
+    rows = []
+    for size in sizes:
+        codes = rng.integers(0, 2, size)
+        po2 = rng.uniform(lookup.po2_min, lookup.po2_max, size)
+        funcs: dict[str, Callable] = {
+            "closed": lambda: satHbO2_array(codes, po2),
+            "linear": lambda: lookup.sat(codes, po2, "linear"),
+            "cubic": lambda: lookup.sat(codes, po2, "cubic"),
+        }
+        row: dict[str, Any] = {"size": size}
+        for name, func in funcs.items():
+            row[name] = min(timeit.repeat(func, number=1, repeat=repeat))
+        exact = funcs["closed"]()
+        row["linear_err"] = np.abs(funcs["linear"]() - exact).max()
+        row["cubic_err"] = np.abs(funcs["cubic"]() - exact).max()
+        logging.info(f"{row=}")
+        rows.append(row)
+    return pd.DataFrame(rows).set_index("size")
+
+
+# ------------------------------------
+# gauge templates (static artists built once, the marker updated per gas)
+class GaugeTemplate(abc.ABC):
+    """
+    Persistent gauge figure: build the static artists once, update per gas.
+
+    + GaugeTemplate(pyplot=False)
+
+    + attributes :
+        fig : the figure (plt.Figure or matplotlib.Figure) \
+        axes : list of the axes \
+        markers : list of the red markers (one per axis) \
+    + methods :
+        update : move the markers and the limits for a gas, return the figure \
+        save : save the figure as png (without the footers) \
+
+    with a single gas, the gas is used whatever num (as in the former plot_GAa).
+    subclasses define name, _axes (figure construction), _build (static
+    artists) and _update (marker positions & limits).
+    Speed (Agg, one gas step, build + draw vs update + draw):
+        ~ 2 to 2.5 times faster (cf benchmark_gauges), eg plot_acidbas
+        0.18 s -> 0.08 s, plot_o2 0.05 s -> 0.02 s
+    """
+
+    name = "gauge"
+
+    def __init__(self, pyplot: bool = False) -> None:
+        self.pyplot = pyplot
+        self.fig, self.axes = self._axes()
+        self.markers: list[Any] = []
+        self._build()
+        self.name_text = self.fig.text(
+            0.99, 0.01, self.name, ha="right", va="bottom", alpha=0.4, size=12
+        )
+        self.num_text = self.fig.text(
+            0.01, 0.01, "", ha="left", va="bottom", alpha=0.4, size=12
+        )
+
+    def _axes(self) -> tuple[Any, list[Any]]:
+        fig = plt.figure(figsize=(14, 3)) if self.pyplot else Figure(figsize=(14, 3))
+        return fig, [fig.add_subplot(111)]
+
+    @abc.abstractmethod
+    def _build(self) -> None:
+        """Build the static artists (and the markers, cf _marker)."""
+
+    @abc.abstractmethod
+    def _update(self, gases: list[Any], num: int) -> None:
+        """Move the markers and set the limits for gases[num]."""
+
+    def _marker(self, ax: Any, fmt: str = "v-", **kwargs: Any) -> None:
+        """Add a (red) marker to the axis."""
+        params = dict(color="tab:red", markersize=32, markeredgecolor="k")
+        params.update(kwargs)
+        params = {key: val for key, val in params.items() if val is not None}
+        self.markers.extend(ax.plot([np.nan], [0], fmt, **params))
+
+    def update(self, gases: list[Any], num: int) -> Any:
+        """
+        Update the gauge for a gas.
+
+        Parameters
+        ----------
+        gases : list
+            list of bg.Gas objects
+        num : int
+            location in the list.
+
+        Returns
+        -------
+        fig : plt.Figure or matplotlib.Figure
+        """
+        self._update(gases, num if len(gases) > 1 else 0)
+        self.num_text.set_text(f"{num=}")
+        return self.fig
+
+    def save(self, name: str) -> None:
+        """Save the figure (png), the footers are not saved (as before)."""
+        footers = [self.name_text, self.num_text]
+        for text in footers:
+            text.set_visible(False)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=self.fig)
+        for text in footers:
+            text.set_visible(True)
+
+
+class AcidBasGauge(GaugeTemplate):
+    """Gauges of the acid-base analysis (cf plot_acidbas)."""
+
+    name = "plot_acidbas"
+
+    def _axes(self) -> tuple[Any, list[Any]]:
+        if self.pyplot:
+            fig, axes = plt.subplots(nrows=3, ncols=1, figsize=(14, 8), frameon=True)
+            return fig, list(axes)
+        fig = Figure(figsize=(14, 8), frameon=True)
+        return fig, [fig.add_subplot(3, 1, i) for i in range(1, 4)]
+
+    def _build(self) -> None:
+        legs = [
+            (r"$pH$", "k"),
+            (r"$P_{CO_2}$", "tab:blue"),
+            (r"$HCO_3^-$", "tab:orange"),
+        ]
+        for ax, leg in zip(self.axes, legs):
+            ax.axhline(0, color="tab:gray")
+            ax.text(
+                0.05,
+                0.5,
+                leg[0],
+                fontsize=22,
+                color=leg[1],
+                horizontalalignment="left",
+                verticalalignment="center",
+                transform=ax.transAxes,
+                backgroundcolor="w",
+            )
+        txt = f"acid {'-' * 76} alcalin"
+        self.fig.suptitle(txt, color="tab:gray")
+        ax = self.axes[0]
+        ax.xaxis.set_major_formatter(FormatStrFormatter("%.2f"))
+        (self.ph_range,) = ax.plot(
+            [7.35, 7.45],
+            [0, 0],
+            label="line 1",
+            linewidth=5,
+            color="tab:gray",
+            marker="d",
+            markersize=10,
+        )
+        self._marker(ax)
+        ax = self.axes[1]
+        ax.plot(
+            [35, 45],
+            [0, 0],
+            label="line 1",
+            linewidth=5,
+            color="tab:blue",
+            alpha=0.8,
+            marker="d",
+            markersize=10,
+        )
+        self._marker(ax)
+        ax = self.axes[2]
+        ax.plot(
+            [20, 30],
+            [0, 0],
+            label="line 1",
+            linewidth=5,
+            color="tab:orange",
+            marker="d",
+            markersize=10,
+        )
+        self._marker(ax)
+        for ax in self.axes:
+            ax.get_yaxis().set_visible(False)
+            ax.tick_params(colors="tab:grey")
+            for spine in ["left", "top", "right", "bottom"]:
+                ax.spines[spine].set_visible(False)
+
+    def _update(self, gases: list[Any], num: int) -> None:
+        gas = gases[num]
+        if gas.spec == "horse":
+            self.ph_range.set_xdata([7.35, 7.45])
+        else:
+            self.ph_range.set_xdata([7.35, 7.42])
+        ph, pco2, hco3 = gas.ph, gas.pco2, gas.hco3
+        for marker, value in zip(self.markers, [ph, pco2, hco3]):
+            marker.set_xdata([value])
+        phmin, phmax = 7.3, 7.5
+        if ph >= 7.5:
+            phmax = ph + 0.1
+        if ph <= 7.3:
+            phmin = ph - 0.1
+        self.axes[0].set_xlim([phmin, phmax])
+        co2min, co2max = 25, 55
+        if pco2 >= co2max:
+            co2max = pco2 + 5
+        if pco2 <= co2min:
+            co2min = pco2 - 5
+        self.axes[1].set_xlim([co2max, co2min])
+        hco3min, hco3max = 15, 35
+        if hco3 >= hco3max:
+            hco3max = hco3 + 5
+        if hco3 <= hco3min:
+            hco3min = hco3 - 5
+        self.axes[2].set_xlim([hco3min, hco3max])
+
+
+def _po2_xlim(po2: float) -> list[float]:
+    """Return the po2 gauge limits."""
+    if po2 < 120:
+        return [po2 - 20, 120]
+    return [70, po2 + 20]
+
+
+class O2Gauge(GaugeTemplate):
+    """Gauge of the PaO2 (cf plot_o2)."""
+
+    name = "plot_o2"
+
+    def _build(self) -> None:
+        ax = self.axes[0]
+        ax.axhline(0, color="tab:gray")
+        ax.plot(
+            [90, 100],
+            [0, 0],
+            label="line 1",
+            linewidth=5,
+            color="tab:green",
+            marker="d",
+            markersize=10,
+        )
+        self._marker(ax)
+        ax.text(
+            0.05,
+            0.5,
+            r"$P_{O_2}$",
+            fontsize=32,
+            color="tab:green",
+            horizontalalignment="left",
+            verticalalignment="center",
+            transform=ax.transAxes,
+            backgroundcolor="w",
+        )
+        for spine in ["top", "right", "left", "bottom"]:
+            ax.spines[spine].set_visible(False)
+        ax.get_yaxis().set_visible(False)
+        ax.get_xaxis().set_visible(True)
+        ax.axes.tick_params(colors="tab:gray")
+
+    def _update(self, gases: list[Any], num: int) -> None:
+        po2 = gases[num].po2
+        self.markers[0].set_xdata([po2])
+        self.axes[0].set_xlim(_po2_xlim(po2))
+
+
+class VentilGauge(GaugeTemplate):
+    """Gauges of the ventilation (cf plot_ventil)."""
+
+    name = "plot_ventil"
+
+    def _axes(self) -> tuple[Any, list[Any]]:
+        if self.pyplot:
+            fig, axes = plt.subplots(nrows=2, ncols=1, figsize=(14, 6))
+            return fig, list(axes)
+        fig = Figure(figsize=(14, 8), frameon=True)
+        return fig, [fig.add_subplot(3, 1, i) for i in range(1, 3)]
+
+    def _build(self) -> None:
+        self.fig.suptitle("ventilation", color="tab:gray")
+        for ax in self.axes:
+            ax.axhline(0, color="tab:gray")
+        ax = self.axes[0]
+        ax.plot(
+            [90, 100],
+            [0, 0],
+            label="line 1",
+            linewidth=3,
+            marker="d",
+            markersize=10,
+            color="tab:green",
+        )
+        self._marker(ax)  # po2
+        ax.text(
+            0.05,
+            0.5,
+            r"$P_{O_2}$",
+            fontsize=32,
+            color="tab:green",
+            horizontalalignment="left",
+            verticalalignment="center",
+            transform=ax.transAxes,
+            backgroundcolor="w",
+        )
+        ax = self.axes[1]
+        ax.plot(
+            [35, 45], [0, 0], label="line 1", linewidth=3, marker="d", markersize=10
+        )
+        self._marker(ax)  # pco2
+        ax.text(
+            0.05,
+            0.5,
+            r"$P_{CO_2}$",
+            fontsize=32,
+            color="tab:blue",
+            horizontalalignment="left",
+            verticalalignment="center",
+            transform=ax.transAxes,
+            backgroundcolor="w",
+        )
+        for ax in self.axes:
+            ax.axes.tick_params(colors="tab:gray")
+            ax.get_xaxis().tick_bottom()
+            ax.get_yaxis().set_visible(False)
+            ax.get_xaxis().set_visible(True)
+            for spine in ["left", "top", "right", "bottom"]:
+                ax.spines[spine].set_visible(False)
+
+    def _update(self, gases: list[Any], num: int) -> None:
+        gas = gases[num]
+        po2, pco2 = gas.po2, gas.pco2
+        self.markers[0].set_xdata([po2])
+        self.axes[0].set_xlim(_po2_xlim(po2))
+        self.markers[1].set_xdata([pco2])
+        co2min, co2max = 25, 55
+        if pco2 >= co2max:
+            co2max = pco2 + 5
+        if pco2 <= co2min:
+            co2min = pco2 - 5
+        self.axes[1].set_xlim([co2min, co2max])
+
+
+class GAaGauge(GaugeTemplate):
+    """Gauge of the alveolo-arterial gradient (cf plot_GAa)."""
+
+    name = "plot_GAa"
+
+    def _build(self) -> None:
+        ax = self.axes[0]
+        ax.axhline(0, color="tab:gray")
+        ax.plot(
+            [5, 15],
+            [0, 0],
+            label="line 1",
+            linewidth=5,
+            color="tab:blue",
+            marker="d",
+            markersize=10,
+        )
+        self._marker(ax, markeredgecolor=None, alpha=0.8)
+        st = "gradient alvéolo-artériel ($Palv_{O_2} - Pa_{O_2}$) "
+        ax.set_title(st, backgroundcolor="w", color="tab:grey")
         ax.get_yaxis().set_visible(False)
-        ax.tick_params(colors="tab:grey")
         for spine in ["left", "top", "right", "bottom"]:
             ax.spines[spine].set_visible(False)
+        ax.axes.tick_params(colors="tab:gray")
+
+    def _update(self, gases: list[Any], num: int) -> None:
+        gAa = gases[num].gAa()
+        self.markers[0].set_xdata([gAa])
+        if gAa > 25:
+            self.axes[0].set_xlim([0, gAa + 10])
+        else:
+            self.axes[0].set_xlim([0, 30])
+
+
+class RatioGauge(GaugeTemplate):
+    """Gauge of the PaO2 / FiO2 ratio (cf plot_ratio)."""
+
+    name = "plot_ratio"
+
+    def _build(self) -> None:
+        ax = self.axes[0]
+        ax.axhline(0, color="tab:grey")
+        for xdata, color, width in [
+            ([100, 200], "tab:red", 2),
+            ([200, 300], "tab:orange", 4),
+            ([300, 500], "tab:blue", 6),
+        ]:
+            ax.plot(
+                xdata,
+                [0, 0],
+                color,
+                label="line 1",
+                linewidth=width,
+                marker="d",
+                markersize=10,
+            )
+        self._marker(ax, "rv-", color=None)  # ratio
+        st = r"ratio $Pa_{O_2}\ /\ Fi_{O_2}$"
+        ax.set_title(st, backgroundcolor="w", color="tab:gray")
+        ax.yaxis.set_visible(False)
+        for x, txt, color in [
+            (150, r"ALI", "tab:red"),
+            (250, r"ARDS", "tab:orange"),
+            (400, r"norme", "tab:blue"),
+        ]:
+            ax.text(
+                x, -0.025, txt, fontsize=18, color=color, horizontalalignment="center"
+            )
+        ax.axes.tick_params(colors="tab:gray")
+        for spine in ["left", "top", "right", "bottom"]:
+            ax.spines[spine].set_visible(False)
+
+    def _update(self, gases: list[Any], num: int) -> None:
+        self.markers[0].set_xdata([gases[num].ratio()])
+        # limits from the data (as a new plot)
+        ax = self.axes[0]
+        ax.relim()
+        ax.autoscale_view()
+
+
+def benchmark_gauges(gases: list[Any], steps: int = 20) -> pd.DataFrame:
+    """
+    Compare building a new gauge figure and updating a template per gas step.
+
+    (offscreen, each step includes an Agg draw)
+
+    Parameters
+    ----------
+    gases : list
+        list of bg.Gas objects (the steps cycle over the list).
+    steps : int, optional (default is 20)
+        number of gas steps.
+
+    Returns
+    -------
+    pd.DataFrame
+        time per step (s) for 'build' and 'update', and the speedup,
+        one row per gauge.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    rows = []
+    for gauge in [AcidBasGauge, O2Gauge, VentilGauge, GAaGauge, RatioGauge]:
+        nums = [i % len(gases) for i in range(steps)]
+        start = timeit.default_timer()
+        for num in nums:
+            FigureCanvasAgg(gauge().update(gases, num)).draw()
+        build = (timeit.default_timer() - start) / steps
+        template = gauge()
+        canvas = FigureCanvasAgg(template.fig)
+        start = timeit.default_timer()
+        for num in nums:
+            template.update(gases, num)
+            canvas.draw()
+        update = (timeit.default_timer() - start) / steps
+        rows.append(
+            {
+                "gauge": gauge.name,
+                "build": build,
+                "update": update,
+                "speedup": build / update,
+            }
+        )
+        logging.info(f"{rows[-1]=}")
+    return pd.DataFrame(rows).set_index("gauge")
+
+
+# %
+def plot_acidbas(
+    gases: list,
+    num: int,
+    savedir: Optional[str] = None,
+    ident: str = "",
+    saveit: bool = False,
+    pyplot: bool = True,
+    template: Optional[GaugeTemplate] = None,
+) -> plt.Figure:
+    """
+    Plot the acid-base analysis.
+
+    Parameters
+    ----------
+    gases : list
+        list of bg.Gas objects
+    num : int
+        location in the list.
+    savedir : str
+        path to save.
+    ident : str, optional (default is "")
+        string to identify in the save name.
+    saveit : bool, optional (default is False)
+        to save or not to save
+    pyplot : bool, optional (default is False)
+        True: return a pyplot,    else a Figure obj
+    template : AcidBasGauge, optional (default is None)
+        a template to update (reuse the figure), if None a new one is built.
+
+    Returns
+    -------
+    fig : plt.Figure or matplotlib.Figure
+        the plot
+    """
+    if savedir is None:
+        savedir = os.path.expanduser("~")
+    if template is None:
+        template = AcidBasGauge(pyplot)
+    fig = template.update(gases, num)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "acidBase"))
+        template.save(os.path.expanduser(name))
     if pyplot:
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "acidBase"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
         plt.show()
-    fig.text(0.99, 0.01, "plot_acidbas", ha="right", va="bottom", alpha=0.4, size=12)
-    fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
 
 
@@ -475,7 +2060,6 @@ def plot_display(
     for row in rows[1:]:
         data.append([getattr(gases[num], row), usualVal[row]])
 
-    fig = plt.figure(figsize=(14, 5)) if pyplot else Figure(figsize=(14, 5))
     if pyplot:
         fig = plt.figure(figsize=(14, 5))
     else:
@@ -499,16 +2083,116 @@ def plot_display(
     if pyplot:
         # fig.set.tight_layout(True)
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "display"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "display"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(0.99, 0.01, "plot_display", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
 
 
 # %------------------------------------
+# acid-base morpion classifier
+# reference values in acid -> alcaline order
+MORPION_REFS = {
+    "ph": (7.2, 7.35, 7.45, 7.5),
+    "pco2": (60, 42, 38, 30),
+    "hco3": (14, 22, 26, 32),
+}
+# morpion display when the value is missing (NB the middle signs differ)
+MORPION_BASE = {
+    "ph": ("-", "-", "-"),
+    "pco2": ("-", "–", "-"),
+    "hco3": ("-", "–", "-"),
+}
+# code for a missing (NaN) value
+MORPION_NAN = -128
+
+
+def morpion_codes(key: str, values: Any) -> np.ndarray:
+    """
+    Classify values as acid/normal/alcaline (vectorized).
+
+    codes : -2 severe acid ('<<'), -1 acid ('x'), 0 normal, 1 alcaline ('x'),
+    2 severe alcaline ('>>'), MORPION_NAN for a missing value
+    (the bounds are those of MORPION_REFS, the normal range is inclusive).
+
+    Parameters
+    ----------
+    key : str
+        in ['ph', 'pco2', 'hco3'].
+    values : float or array like
+        the values.
+
+    Returns
+    -------
+    np.ndarray
+        int8 codes, same shape as values.
+    """
+    refs = np.asarray(MORPION_REFS[key], dtype=float)
+    vals = np.asarray(values, dtype=float)
+    # pco2 references are decreasing: classify the opposite values
+    sign = 1.0 if refs[0] < refs[-1] else -1.0
+    refs = sign * refs
+    vals = sign * vals
+    # 0 (< severe), 1 (< normal), 2 ; plus 0 (<= normal), 1 (<= severe), 2
+    low = np.digitize(vals, refs[:2])
+    high = np.digitize(vals, refs[2:], right=True)
+    codes = (low - 2 + high).astype(np.int8)
+    return np.where(np.isnan(vals), np.int8(MORPION_NAN), codes)
+
+
+def morpion_glyphs(key: str, codes: Any) -> Any:
+    """
+    Return the morpion display of codes (cf morpion_codes).
+
+    Parameters
+    ----------
+    key : str
+        in ['ph', 'pco2', 'hco3'].
+    codes : int or array like
+        the codes.
+
+    Returns
+    -------
+    list[str] or nested lists
+        the 3 signs to use for the morpion display (for each code).
+    """
+    base = MORPION_BASE[key]
+    # one row per code: -2, -1, 0, 1, 2, NaN
+    glyphs = np.array([base] * 6, dtype=object)
+    glyphs[0, 0], glyphs[1, 0] = "<<", "x"
+    glyphs[2, 1] = "x"
+    glyphs[3, 2], glyphs[4, 2] = "x", ">>"
+    codes = np.asarray(codes)
+    index = np.where(codes == MORPION_NAN, 5, codes + 2)
+    return glyphs[index].tolist()
+
+
+def classify_acidbase(data: Any) -> pd.DataFrame:
+    """
+    Classify the acid-base status of a set of gases (cf morpion_codes).
+
+    Parameters
+    ----------
+    data : pd.DataFrame, GasBatch or list of Gas
+        the gases (ph, pco2 and hco3 values).
+
+    Returns
+    -------
+    pd.DataFrame
+        int8 codes, columns ph, pco2 & hco3 (severe when abs(code) == 2).
+    """
+    if isinstance(data, pd.DataFrame):
+        codes = {key: morpion_codes(key, data[key]) for key in MORPION_REFS}
+        return pd.DataFrame(codes, index=data.index)
+    if not isinstance(data, GasBatch):
+        data = GasBatch.from_gases(data)
+    codes = {key: morpion_codes(key, getattr(data, key)) for key in MORPION_REFS}
+    return pd.DataFrame(codes)
+
+
 def phline(val: float) -> list[str]:
     """
     Return a list containing the morpion display for pH.
@@ -524,23 +2208,7 @@ def phline(val: float) -> list[str]:
         the signs to use for the morpion display.
 
     """
-    ref = [7.2, 7.35, 7.45, 7.5]
-    # base
-    arrows = ["-", "-", "-"]
-    # low´´
-    if val < ref[1]:
-        arrows[0] = "x"
-    if val < ref[0]:
-        arrows[0] = "<<"
-    # middle
-    if ref[1] <= val <= ref[2]:
-        arrows[1] = "x"
-    # hight
-    if ref[2] < val:
-        arrows[2] = "x"
-    if ref[3] < val:
-        arrows[2] = ">>"
-    return arrows
+    return morpion_glyphs("ph", morpion_codes("ph", val))
 
 
 def co2line(val: float) -> list[str]:
@@ -558,19 +2226,7 @@ def co2line(val: float) -> list[str]:
         the signs to use for the morpion display.
 
     """
-    ref = [60, 42, 38, 30]  # NB data are presented in acid , norm, basic order
-    arrows = ["-", "–", "-"]
-    if val > ref[1]:
-        arrows[0] = "x"
-    if val > ref[0]:
-        arrows[0] = "<<"
-    if ref[1] >= val >= ref[2]:
-        arrows[1] = "x"
-    if ref[2] > val:
-        arrows[2] = "x"
-    if ref[3] > val:
-        arrows[2] = ">>"
-    return arrows
+    return morpion_glyphs("pco2", morpion_codes("pco2", val))
 
 
 def hco3line(val: float) -> list[str]:
@@ -588,19 +2244,7 @@ def hco3line(val: float) -> list[str]:
         the signs to use for the morpion display.
 
     """
-    ref = [14, 22, 26, 32]
-    arrows = ["-", "–", "-"]
-    if val < ref[1]:
-        arrows[0] = "x"
-    if val < ref[0]:
-        arrows[0] = "<<"
-    if ref[1] <= val <= ref[2]:
-        arrows[1] = "x"
-    if ref[2] < val:
-        arrows[2] = "x"
-    if ref[3] < val:
-        arrows[2] = ">>"
-    return arrows
+    return morpion_glyphs("hco3", morpion_codes("hco3", val))
 
 
 def plot_morpion(
@@ -640,10 +2284,8 @@ def plot_morpion(
     title = (
         "pH=" + str(gas.ph) + r"    pco2=" + str(gas.pco2) + "    hco3=" + str(gas.hco3)
     )
-    data = []
-    data.append(phline(gas.ph))
-    data.append(co2line(gas.pco2))
-    data.append(hco3line(gas.hco3))
+    codes = classify_acidbase([gas]).iloc[0]
+    data = [morpion_glyphs(key, code) for key, code in codes.items()]
 
     cols = ("acide", "norm", "alcalin")
     rows = (r"$pH$", r"$P_{CO_2}$", r"$HCO_3^-$")
@@ -671,10 +2313,10 @@ def plot_morpion(
     # fig.set_tight_layout(True)
     if pyplot:
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "morpion"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "morpion"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
 
     fig.text(0.99, 0.01, "plot_morpion", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
@@ -689,6 +2331,7 @@ def plot_o2(
     ident: str = "",
     saveit: bool = False,
     pyplot: bool = True,
+    template: Optional[GaugeTemplate] = None,
 ) -> plt.Figure:
     """
     Plot O2.
@@ -707,6 +2350,8 @@ def plot_o2(
         to save or not to save
     pyplot : bool, optional (default is False)
         True: return a pyplot,    else a Figure obj
+    template : O2Gauge, optional (default is None)
+        a template to update (reuse the figure), if None a new one is built.
 
     Returns
     -------
@@ -715,58 +2360,14 @@ def plot_o2(
     """
     if savedir is None:
         savedir = os.path.expanduser("~")
-    gas = gases[num]
-    po2 = gas.po2
-    fig = plt.figure(figsize=(14, 3)) if pyplot else Figure(figsize=(14, 3))
-    # if pyplot:
-    #     fig = plt.figure(figsize=(14, 3))
-    # else:
-    #     fig = Figure(figsize=(14, 3))
-    # fig.suptitle("oxygénation : $Pa_{O_2}$ ", fontsize=24, backgroundcolor='w',
-    #              color='tab:gray')
-    ax = fig.add_subplot(111)
-    ax.axhline(0, color="tab:gray")
-    ax.plot(
-        [90, 100],
-        [0, 0],
-        label="line 1",
-        linewidth=5,
-        color="tab:green",
-        marker="d",
-        markersize=10,
-    )
-    ax.plot([po2], [0], "v-", color="tab:red", markersize=32, markeredgecolor="k")
-    if po2 < 120:
-        ax.set_xlim([po2 - 20, 120])
-    else:
-        ax.set_xlim([70, po2 + 20])
-    ax.text(
-        0.05,
-        0.5,
-        r"$P_{O_2}$",
-        fontsize=32,
-        color="tab:green",
-        horizontalalignment="left",
-        verticalalignment="center",
-        transform=ax.transAxes,
-        backgroundcolor="w",
-    )
-    for spine in ["top", "right", "left", "bottom"]:
-        ax.spines[spine].set_visible(False)
-    ax.get_yaxis().set_visible(False)
-    ax.get_xaxis().set_visible(True)
-    # ax.grid()
-    ax.axes.tick_params(colors="tab:gray")
-    # fig.set.tight_layout(True)
+    if template is None:
+        template = O2Gauge(pyplot)
+    fig = template.update(gases, num)
     if pyplot:
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "O2"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
-
-    fig.text(0.99, 0.01, "plot_o2", ha="right", va="bottom", alpha=0.4, size=12)
-    fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "O2"))
+        template.save(os.path.expanduser(name))
     return fig
 
 
@@ -778,6 +2379,7 @@ def plot_ventil(
     ident: str = "",
     saveit: bool = False,
     pyplot: bool = True,
+    template: Optional[GaugeTemplate] = None,
 ) -> plt.Figure:
     """
     Plot ventil.
@@ -796,6 +2398,8 @@ def plot_ventil(
         to save or not to save
     pyplot : bool, optional (default is False)
         True: return a pyplot,    else a Figure obj
+    template : VentilGauge, optional (default is None)
+        a template to update (reuse the figure), if None a new one is built.
 
     Returns
     -------
@@ -803,92 +2407,14 @@ def plot_ventil(
     """
     if savedir is None:
         savedir = os.path.expanduser("~")
-    gas = gases[num]
-    po2 = gas.po2
-    pco2 = gas.pco2
-
-    if pyplot:
-        fig, axes = plt.subplots(nrows=2, ncols=1, figsize=(14, 6))
-        # fig = plt.figure(figsize=(14, 6))
-    else:
-        fig = Figure(figsize=(14, 8), frameon=True)
-        axes = []
-        for i in range(1, 3):
-            axes.append(fig.add_subplot(3, 1, i))
-    fig.suptitle("ventilation", color="tab:gray")
-
-    for ax in axes:
-        ax.axhline(0, color="tab:gray")
-
-    ax = axes[0]
-    ax.plot(
-        [90, 100],
-        [0, 0],
-        label="line 1",
-        linewidth=3,
-        marker="d",
-        markersize=10,
-        color="tab:green",
-    )
-    ax.plot(
-        [po2], [0], "v-", color="tab:red", markersize=32, markeredgecolor="k"
-    )  # po2
-    if po2 < 120:
-        ax.set_xlim([po2 - 20, 120])
-    else:
-        ax.set_xlim([70, po2 + 20])
-    ax.text(
-        0.05,
-        0.5,
-        r"$P_{O_2}$",
-        fontsize=32,
-        color="tab:green",
-        horizontalalignment="left",
-        verticalalignment="center",
-        transform=ax.transAxes,
-        backgroundcolor="w",
-    )
-
-    ax = axes[1]
-    ax.plot([35, 45], [0, 0], label="line 1", linewidth=3, marker="d", markersize=10)
-    ax.plot(
-        [pco2], [0], "v-", color="tab:red", markersize=32, markeredgecolor="k"
-    )  # pco2
-    co2min, co2max = 25, 55
-    if pco2 >= co2max:
-        co2max = pco2 + 5
-    if pco2 <= co2min:
-        co2min = pco2 - 5
-    ax.set_xlim([co2min, co2max])
-    ax.text(
-        0.05,
-        0.5,
-        r"$P_{CO_2}$",
-        fontsize=32,
-        color="tab:blue",
-        horizontalalignment="left",
-        verticalalignment="center",
-        transform=ax.transAxes,
-        backgroundcolor="w",
-    )
-
-    for ax in axes:
-        ax.axes.tick_params(colors="tab:gray")
-        # ax.grid()
-        ax.get_xaxis().tick_bottom()
-        ax.get_yaxis().set_visible(False)
-        ax.get_xaxis().set_visible(True)
-        for spine in ["left", "top", "right", "bottom"]:
-            ax.spines[spine].set_visible(False)
-    # #fig.set.tight_layout(True)
+    if template is None:
+        template = VentilGauge(pyplot)
+    fig = template.update(gases, num)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "ventil"))
+        template.save(os.path.expanduser(name))
     if pyplot:
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "ventil"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
         plt.show()
-    fig.text(0.99, 0.01, "plot_ventil", ha="right", va="bottom", alpha=0.4, size=12)
-    fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
 
 
@@ -942,7 +2468,7 @@ def plot_pieCasc(
     for d in val:
         if any(np.isnan(x) for x in d.values()):
             print("plot_pieCas, some values are Nan : aborted")
-            return plt.figure()
+            return plt.figure() if pyplot else Figure()
 
     if pyplot:
         fig = plt.figure(figsize=(14, 6))  # (figsize=(14, 3))
@@ -988,13 +2514,13 @@ def plot_pieCasc(
     # alpha
     if pyplot:
         fig.tight_layout()
-        if saveit:
-            if pcent:
-                name = os.path.join(savedir, (str(ident) + "pieCascPercent"))
-            else:
-                name = os.path.join(savedir, (str(ident) + "pieCasc"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        if pcent:
+            name = os.path.join(savedir, (str(ident) + "pieCascPercent"))
+        else:
+            name = os.path.join(savedir, (str(ident) + "pieCasc"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(0.99, 0.01, "plot_pieCasc", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
@@ -1104,10 +2630,10 @@ def plot_cascO2(
     if pyplot:
         # #fig.set.tight_layout(True)
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "cascO2"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "cascO2"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
 
     fig.text(0.99, 0.01, "plot_cascO2", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{nums=}", ha="left", va="bottom", alpha=0.4, size=12)
@@ -1197,10 +2723,10 @@ def plot_cascO2Lin(
     if pyplot:
         fig.tight_layout()
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "cascO2"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "cascO2"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(0.99, 0.01, "plot_cascO2Lin", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{nums=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
@@ -1214,6 +2740,7 @@ def plot_GAa(
     ident: str = "",
     saveit: bool = False,
     pyplot: bool = True,
+    template: Optional[GaugeTemplate] = None,
 ) -> plt.Figure:
     """
     Plot alveolo-arterial gradient.
@@ -1232,6 +2759,8 @@ def plot_GAa(
         to save or not to save
     pyplot : bool, optional (default is False)
         True: return a pyplot,    else a Figure obj
+    template : GAaGauge, optional (default is None)
+        a template to update (reuse the figure), if None a new one is built.
 
     Returns
     -------
@@ -1240,49 +2769,14 @@ def plot_GAa(
     """
     if savedir is None:
         savedir = os.path.expanduser("~")
-    if len(gases) > 1:
-        casc = gases[num].casc()
-    else:
-        casc = gases[0].casc()
-    gAa = casc[-2] - casc[-1]
-
-    if pyplot:
-        fig = plt.figure(figsize=(14, 3))
-    else:
-        fig = Figure(figsize=(14, 3))
-    ax = fig.add_subplot(111)
-    ax.axhline(0, color="tab:gray")
-    ax.plot(
-        [5, 15],
-        [0, 0],
-        label="line 1",
-        linewidth=5,
-        color="tab:blue",
-        marker="d",
-        markersize=10,
-    )
-    ax.plot([gAa], [0], "v-", color="tab:red", markersize=32, alpha=0.8)  # GAa
-    st = "gradient alvéolo-artériel ($Palv_{O_2} - Pa_{O_2}$) "
-    ax.set_title(st, backgroundcolor="w", color="tab:grey")
-    ax.get_yaxis().set_visible(False)
-    print("plot_GAa : ", casc[-2] - casc[-1], gAa)
-    if gAa > 25:
-        ax.set_xlim([0, gAa + 10])
-    else:
-        ax.set_xlim([0, 30])
-    for spine in ["left", "top", "right", "bottom"]:
-        ax.spines[spine].set_visible(False)
-    #    ax.grid()
-    ax.axes.tick_params(colors="tab:gray")
-    # fig.set.tight_layout(True)
+    if template is None:
+        template = GAaGauge(pyplot)
+    fig = template.update(gases, num)
     if pyplot:
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "Gaa"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
-    fig.text(0.99, 0.01, "plot_GAa", ha="right", va="bottom", alpha=0.4, size=12)
-    fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "Gaa"))
+        template.save(os.path.expanduser(name))
     return fig
 
 
@@ -1294,6 +2788,7 @@ def plot_ratio(
     ident: str = "",
     saveit: bool = False,
     pyplot: bool = True,
+    template: Optional[GaugeTemplate] = None,
 ) -> plt.Figure:
     """
     Plot the ratio O2insp / PaO2.
@@ -1312,6 +2807,8 @@ def plot_ratio(
         to save or not to save
     pyplot : bool, optional (default is False)
         True: return a pyplot,    else a Figure obj
+    template : RatioGauge, optional (default is None)
+        a template to update (reuse the figure), if None a new one is built.
 
     Returns
     -------
@@ -1320,81 +2817,14 @@ def plot_ratio(
     """
     if savedir is None:
         savedir = os.path.expanduser("~")
-    gas = gases[num]
-    ratio = gas.po2 / gas.fio2
-    # mes['po2'] / mes['fio2']
-
-    if pyplot:
-        fig = plt.figure(figsize=(14, 3))
-    else:
-        fig = Figure(figsize=(14, 3))
-    ax = fig.add_subplot(111)
-    ax.axhline(0, color="tab:grey")
-    ax.plot(
-        [100, 200],
-        [0, 0],
-        "tab:red",
-        label="line 1",
-        linewidth=2,
-        marker="d",
-        markersize=10,
-    )
-    ax.plot(
-        [200, 300],
-        [0, 0],
-        "tab:orange",
-        label="line 1",
-        linewidth=4,
-        marker="d",
-        markersize=10,
-    )
-    ax.plot(
-        [300, 500],
-        [0, 0],
-        "tab:blue",
-        label="line 1",
-        linewidth=6,
-        marker="d",
-        markersize=10,
-    )
-    ax.plot([ratio], [0], "rv-", markersize=32, markeredgecolor="k")  # ratio
-    st = r"ratio $Pa_{O_2}\ /\ Fi_{O_2}$"
-    ax.set_title(st, backgroundcolor="w", color="tab:gray")
-    ax.yaxis.set_visible(False)
-    #    ax.plot(300, 0, 'tab:blue', label='line 1', linewidth=1)
-
-    ax.text(
-        150, -0.025, r"ALI", fontsize=18, color="tab:red", horizontalalignment="center"
-    )
-    ax.text(
-        250,
-        -0.025,
-        r"ARDS",
-        fontsize=18,
-        color="tab:orange",
-        horizontalalignment="center",
-    )
-    ax.text(
-        400,
-        -0.025,
-        r"norme",
-        fontsize=18,
-        color="tab:blue",
-        horizontalalignment="center",
-    )
-    # ax.grid()
-    ax.axes.tick_params(colors="tab:gray")
-    for spine in ["left", "top", "right", "bottom"]:
-        ax.spines[spine].set_visible(False)
-    # fig.set.tight_layout(True)
+    if template is None:
+        template = RatioGauge(pyplot)
+    fig = template.update(gases, num)
     if pyplot:
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "ratio"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
-    fig.text(0.99, 0.01, "plot_ratio", ha="right", va="bottom", alpha=0.4, size=12)
-    fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "ratio"))
+        template.save(os.path.expanduser(name))
     return fig
 
 
@@ -1431,10 +2861,9 @@ def plot_GAaRatio(
     """
     if savedir is None:
         savedir = os.path.expanduser("~")
-    gas = gases[num]
-    casc = gas.casc()
-    gAa = casc[-2] - casc[-1]
-    ratio = gas.po2 / gas.fio2
+    indices = gas_indices(gases, num)
+    gAa = indices["gAa"]
+    ratio = indices["ratio"]
 
     if pyplot:
         fig = plt.figure(figsize=(14, 6))
@@ -1524,10 +2953,10 @@ def plot_GAaRatio(
     # fig.set.tight_layout(True)
     if pyplot:
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "GAaRatio"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "GAaRatio"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(0.99, 0.01, "plot_GAaRatio", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
@@ -1601,10 +3030,10 @@ def plot_RatioVsFio2(
     if pyplot:
         # ##fig.set.tight_layout(True)
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "ratioVsFio2"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "ratioVsFio2"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(
         0.99, 0.01, "plot_RatioVsFio2", ha="right", va="bottom", alpha=0.4, size=12
     )
@@ -1657,7 +3086,8 @@ def plot_satHb(
     if species is None:
         logging.warning(f"{species=} is not defined")
 
-    sat = satHbO2(species, paO2)
+    indices = gas_indices(gases, num)
+    sat = indices["sat"]
 
     if pyplot:
         fig = plt.figure(figsize=(10, 8))
@@ -1674,7 +3104,7 @@ def plot_satHb(
 
     ax.plot([100, 100], [0, 110], "tab:red", linewidth=8, alpha=0.4)  # line ref
     ax.plot([40, 40], [0, 110], color="tab:blue", linewidth=26, alpha=0.4)
-    ax.plot(O2Range, satHbO2(species, O2Range), linewidth=2)  # mesure
+    ax.plot(O2Range, sat_curve(species, O2Range), linewidth=2)  # mesure
     ax.plot([paO2, paO2], [0, sat], "tab:gray", linewidth=1)
     ax.plot([0, paO2], [sat, sat], "tab:gray", linewidth=1)
 
@@ -1696,10 +3126,10 @@ def plot_satHb(
     #    #fig.set.tight_layout(True)
     if pyplot:
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "satHb"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "satHb"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(0.99, 0.01, "plot_satHb", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
@@ -1747,7 +3177,7 @@ def plot_CaO2(
     else:
         O2max = 200
     O2Range = np.arange(1, O2max)
-    contO2 = caO2(species, hb, paO2)
+    contO2 = gas_indices(gases, num)["cao2"]
 
     if pyplot:
         fig = plt.figure(figsize=(10, 8))
@@ -1767,7 +3197,7 @@ def plot_CaO2(
     ax.text(130, 1200, st1 + "\n" + st2, color="tab:gray")
     eq = r"$Ca_{O_2} = 1.36*satHb_{O_2}* [Hb] \ +\ 0.003*Pa_{O_2}$"
     ax.text(50, 2500, eq, backgroundcolor="w", color="tab:grey")
-    ax.plot(O2Range, caO2(species, hb, O2Range), linewidth=2)  # ref
+    ax.plot(O2Range, caO2_curve(species, hb, O2Range), linewidth=2)  # ref
     ax.plot(O2Range, 0.00 * O2Range)
     ax.plot(paO2, contO2, "o-", color="tab:red", markersize=22, alpha=0.8)
     ax.set_ylabel(r"$Ca_{O_2}\ (ml/l)$", color="tab:gray")
@@ -1782,10 +3212,10 @@ def plot_CaO2(
     # fig.set.tight_layout(True)
     if pyplot:
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "caO2"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "caO2"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(0.99, 0.01, "plot_CaO2", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
@@ -1833,7 +3263,8 @@ def plot_varCaO2(
     else:
         O2max = 200
     O2Range = np.arange(1, O2max)
-    sat = satHbO2(species, paO2)
+    indices = gas_indices(gases, num)
+    sat = indices["sat"]
 
     if pyplot:
         fig = plt.figure(figsize=(10, 8))
@@ -1847,7 +3278,7 @@ def plot_varCaO2(
     ax1.plot([100, 100], [0, 110], "tab:red", linewidth=10, alpha=0.5)  # line ref
     ax1.plot([40, 40], [0, 110], color="tab:blue", linewidth=26, alpha=0.5)
     ax1.plot(
-        O2Range, satHbO2(species, O2Range), linewidth=2, color="tab:blue"
+        O2Range, sat_curve(species, O2Range), linewidth=2, color="tab:blue"
     )  # mesure
     ax1.plot([paO2, paO2], [0, sat], "tab:gray", linewidth=1)
     ax1.plot([0, paO2], [sat, sat], "tab:gray", linewidth=1)
@@ -1858,14 +3289,11 @@ def plot_varCaO2(
 
     ax2 = ax1.twinx()
     ax2.get_yaxis().tick_right()
-    ax2.plot(
-        O2Range,
-        ((caO2(species, hb, O2Range + 1) - caO2(species, hb, O2Range))),
-        color="tab:green",
-    )
+    code = species_code(species)
+    ax2.plot(O2Range, dcaO2_dpo2(code, hb, O2Range), color="tab:green")
     ax2.plot(
         paO2,
-        caO2(species, hb, paO2 + 1) - caO2(species, hb, paO2),
+        indices["dcao2_dpo2"],
         "o-",
         color="tab:red",
         markersize=22,
@@ -1883,10 +3311,10 @@ def plot_varCaO2(
     # fig.set.tight_layout(True)
     if pyplot:
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "varCaO2"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "varCaO2"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(0.99, 0.01, "plot_varCaO2", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
@@ -1928,13 +3356,12 @@ def plot_hbEffect(
     gas = gases[num]
     species = gas.spec
     paO2 = gas.po2
-    hb = gas.hb
     if paO2 > 200:
         O2max = paO2 + 50
     else:
         O2max = 200
     O2Range = np.arange(1, O2max)
-    contO2 = caO2(species, hb, paO2)
+    contO2 = gas_indices(gases, num)["cao2"]
 
     if pyplot:
         fig = plt.figure(figsize=(10, 8))
@@ -1947,8 +3374,12 @@ def plot_hbEffect(
         ax.spines[spine].set_visible(False)
     ax.plot([100, 100], [0, 3000], "tab:red", linewidth=8, alpha=0.5)
     ax.plot([40, 40], [0, 3000], color="tab:blue", linewidth=26, alpha=0.5)
-    for nHb in range(5, 20, 2):
-        ax.plot(O2Range, caO2(species, nHb, O2Range), alpha=0.9)
+    hbRange = np.arange(5, 20, 2)
+    contents = caO2_grid(species, hbRange, O2Range)
+    segments = np.stack(np.broadcast_arrays(O2Range, contents), axis=-1)
+    colors = rcParams["axes.prop_cycle"].by_key()["color"]
+    ax.add_collection(LineCollection(segments, colors=colors, alpha=0.9))
+    ax.autoscale_view()
     ax.plot([0, paO2], [contO2, contO2], "tab:gray", linewidth=1)
     ax.plot([paO2, paO2], [0, contO2], "tab:gray", linewidth=1)
     ax.plot(paO2, contO2, "o-", color="tab:red", markersize=22, alpha=0.8)
@@ -1962,15 +3393,86 @@ def plot_hbEffect(
     # fig.set.tight_layout(True)
     if pyplot:
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "hBEffect"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "hBEffect"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(0.99, 0.01, "plot_hbEffect", ha="right", va="bottom", alpha=0.4, size=12)
     fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
 
 
+# --------------------------------------
+def plot_hbMap(
+    gases: list[Any],
+    num: int,
+    savedir: Optional[str] = None,
+    ident: str = "",
+    saveit: bool = False,
+    pyplot: bool = True,
+    hb_step: float = 0.1,
+) -> plt.Figure:
+    """
+    Plot CaO2 as a Hb x PO2 contour map.
+
+    Parameters
+    ----------
+    gases : list
+        list of bg.Gas objects
+    num : int
+        location in the list.
+    savedir : str
+        path to save.
+    ident : str, optional (default is "")
+        string to identify in the save name.
+    saveit : bool, optional (default is False)
+        to save or not to save
+    pyplot : bool, optional (default is False)
+        True: return a pyplot,    else a Figure obj
+    hb_step : float, optional (default is 0.1)
+        the Hb resolution of the map
+
+    Returns
+    -------
+    fig : plt.Figure or matplotlib.Figure
+    """
+    if savedir is None:
+        savedir = os.path.expanduser("~")
+    gas = gases[num]
+    species = gas.spec
+    paO2 = gas.po2
+    hb = gas.hb
+    O2max = max(paO2 + 50, 200)
+    O2Range = np.arange(1, O2max)
+    hbRange = np.arange(5, max(hb + 2, 20) + hb_step, hb_step)
+    contents = caO2_grid(species, hbRange, O2Range)
+
+    if pyplot:
+        fig = plt.figure(figsize=(10, 8))
+    else:
+        fig = Figure(figsize=(10, 8))
+    st = "Hb effect (" + species + r" $Ca_{O_2} \ (ml/l)$ )"
+    fig.suptitle(st, backgroundcolor="w", color="tab:gray")
+    ax = fig.add_subplot(111)
+    mesh = ax.pcolormesh(O2Range, hbRange, contents, shading="auto", alpha=0.8)
+    lines = ax.contour(O2Range, hbRange, contents, colors="w", alpha=0.6)
+    ax.clabel(lines, fmt="%.0f", fontsize=12)
+    fig.colorbar(mesh, ax=ax)
+    ax.plot(paO2, hb, "o", color="tab:red", markersize=22, alpha=0.8)
+    ax.set_ylabel("Hb", color="tab:gray")
+    ax.set_xlabel(r"$P_{O_2} \ (mmHg)$", color="tab:gray")
+    ax.axes.tick_params(colors="tab:gray")
+    if pyplot:
+        plt.show()
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "hbMap"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
+    fig.text(0.99, 0.01, "plot_hbMap", ha="right", va="bottom", alpha=0.4, size=12)
+    fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
+    return fig
+
+
 # --------------------------------------
 def plot_satHorseDog(
     savedir: Optional[str] = None,
@@ -2010,8 +3512,8 @@ def plot_satHorseDog(
     for spine in ["top", "right"]:
         ax.spines[spine].set_visible(False)
     # ax.grid()
-    ax.plot(PO2, satHbO2("horse", PO2), label="Horse", linewidth=2)
-    ax.plot(PO2, satHbO2("dog", PO2), label="Dog", linewidth=2)
+    ax.plot(PO2, sat_curve("horse", PO2), label="Horse", linewidth=2)
+    ax.plot(PO2, sat_curve("dog", PO2), label="Dog", linewidth=2)
     ax.plot([100, 100], [0, 100], color="tab:red", linewidth=10, alpha=0.5)
     ax.plot([40, 40], [0, 100], color="tab:blue", linewidth=26, alpha=0.5)
     ax.legend(loc=4)
@@ -2023,14 +3525,13 @@ def plot_satHorseDog(
     if pyplot:
         # #fig.set.tight_layout(True)
         plt.show()
-        if saveit:
-            name = os.path.join(savedir, (str(ident) + "satHorseDog"))
-            name = os.path.expanduser(name)
-            saveGraph(name, ext="png", close=True, verbose=True)
+    if saveit:
+        name = os.path.join(savedir, (str(ident) + "satHorseDog"))
+        name = os.path.expanduser(name)
+        saveGraph(name, ext="png", close=True, verbose=True, fig=fig)
     fig.text(
         0.99, 0.01, "plot_satHorseDog", ha="right", va="bottom", alpha=0.4, size=12
     )
-    fig.text(0.01, 0.01, f"{num=}", ha="left", va="bottom", alpha=0.4, size=12)
     return fig
 
 
@@ -2092,11 +3593,152 @@ def showPicture(
 
 
 # -----------------------------------------------------------------------------
+def agg_canvas(fig: Figure) -> Any:
+    """
+    Return the canvas used to encode a figure (thread safe, no pyplot state).
+
+    The bare Figures (pyplot=False) are bound to a FigureCanvasAgg, the figures
+    displayed (pyplot or a GUI canvas) keep their canvas.
+    """
+    if type(fig.canvas) is FigureCanvasBase:
+        FigureCanvasAgg(fig)
+    return fig.canvas
+
+
+# the formats encoded from the Agg buffer (one draw for all of them)
+RASTER_FORMATS = {
+    "png": "png",
+    "jpg": "jpeg",
+    "jpeg": "jpeg",
+    "tif": "tiff",
+    "tiff": "tiff",
+    "webp": "webp",
+}
+
+
+def encode_figure(
+    fig: Figure,
+    formats: Any = "png",
+    dpi: Any = "figure",
+    out: Optional[io.BytesIO] = None,
+    **kwargs: Any,
+) -> dict[str, bytes]:
+    """
+    Encode a figure in memory (no temporary file, no pyplot state).
+
+    Parameters
+    ----------
+    fig : Figure
+        the figure (pyplot or bare Figure).
+    formats : str or list of str, optional (default is "png")
+        the formats ('png', 'jpg', 'tiff', 'webp', 'svg', 'pdf', 'eps', ...).
+    dpi : optional (default is "figure")
+        the resolution (None = rcParams['savefig.dpi']).
+    out : io.BytesIO, optional (default is None)
+        a buffer to write the first format into (cf getbuffer() for a memoryview).
+    **kwargs :
+        other print_figure parameters (facecolor, transparent, metadata, ...).
+
+    Returns
+    -------
+    dict[str, bytes]
+        {format: encoded bytes}
+
+    NB the raster formats are encoded from a single Agg draw, each vector
+    format (svg, pdf, ...) needs its own renderer pass.
+    """
+    if isinstance(formats, str):
+        formats = [formats]
+    formats = [fmt.strip(".").lower() for fmt in formats]
+    if dpi is None:
+        dpi = rcParams["savefig.dpi"]
+    if dpi == "figure":
+        dpi = getattr(fig, "_original_dpi", fig.dpi)
+    displayed = agg_canvas(fig)
+    if isinstance(displayed, FigureCanvasAgg):
+        canvas = displayed
+    else:
+        # encode with Agg, then give the canvas back
+        canvas = FigureCanvasAgg(fig)
+    encoded: dict[str, bytes] = {}
+    drawn = False
+    try:
+        for fmt in formats:
+            buf = io.BytesIO() if (out is None or encoded) else out
+            if fmt in RASTER_FORMATS and drawn and not kwargs:
+                # reuse the Agg buffer of the previous draw
+                mpimg.imsave(
+                    buf,
+                    canvas.buffer_rgba(),
+                    format=RASTER_FORMATS[fmt],
+                    origin="upper",
+                    dpi=dpi,
+                )
+            else:
+                canvas.print_figure(buf, format=fmt, dpi=dpi, **kwargs)
+                drawn = drawn or fmt in RASTER_FORMATS
+            encoded[fmt] = buf.getvalue()
+    finally:
+        if fig.canvas is not displayed:
+            fig.set_canvas(displayed)
+    return encoded
+
+
+def write_figure(fig: Figure, path: str, ext: str = "png", dpi: Any = "figure") -> str:
+    """Encode a figure (cf encode_figure) and write it to path, return the path."""
+    ext = ext.strip(".").lower()
+    encoded = encode_figure(fig, ext, dpi)
+    with open(path, "wb") as file:
+        file.write(encoded[ext])
+    return path
+
+
+def render_bytes(
+    func: Callable,
+    gases: list[Any],
+    num: Any,
+    formats: Any = "png",
+    dpi: Any = "figure",
+    **kwargs: Any,
+) -> dict[str, bytes]:
+    """
+    Render a plot straight to memory.
+
+    Parameters
+    ----------
+    func : Callable
+        the plot function (plot_acidbas, plot_o2, ...).
+    gases : list
+        list of bg.Gas objects.
+    num : int or list of int
+        the gas(es) to plot (as for the plot function).
+    formats : str or list of str, optional (default is "png")
+        the formats (cf encode_figure).
+    dpi : optional (default is "figure")
+        the resolution.
+    **kwargs :
+        other parameters of the plot function (ident, pcent, ...).
+
+    Returns
+    -------
+    dict[str, bytes]
+        {format: encoded bytes}
+    """
+    fig = func(gases, num, saveit=False, pyplot=False, **kwargs)
+    encoded = encode_figure(fig, formats, dpi)
+    fig.clear()
+    return encoded
+
+
 def saveGraph(
-    filename: str, ext: str = "png", close: bool = True, verbose: bool = True
+    filename: str,
+    ext: str = "png",
+    close: bool = True,
+    verbose: bool = True,
+    fig: Optional[Figure] = None,
 ) -> None:
     """
-    Save a figure from pyplot.
+    Save a figure.
 
     Parameters
     ----------
@@ -2112,27 +3754,46 @@ def saveGraph(
         the figure multiple times (e.g., to multiple formats), you
         should NOT close it in between saves or you will have to
         re-plot it.
+        (only the pyplot figures are closed, a bare Figure is left to the caller)
     verbose : boolean (default=True)
         Whether to print information about when and where the image
         has been saved.
+    fig : Figure, optional (default=None)
+        The figure to save (pyplot or bare Figure, None = the current
+        pyplot figure (legacy, not thread safe)).
+
+    NB inside a bgrender.keyed(key) block, and if the render cache is enabled
+    (bgrender.use_render_cache), the file is served from or stored in the cache
+    (stored only if the block was opened with missed=True).
     """
+    if fig is None:
+        fig = plt.gcf()
     # Extract the directory and filename from the given path
     dirname = os.path.dirname(filename)
     file = os.path.split(filename)[1] + "." + ext.strip(".")
     if dirname == "":
         dirname = "."
     # If the directory does not exist, create it
-    if not os.path.exists(dirname):
-        os.makedirs(dirname)
+    os.makedirs(dirname, exist_ok=True)
     # The final path to save to
     savedir = os.path.join(dirname, file)
     if verbose:
         print(f"Saving figure to {savedir} ...")
-    # Actually save the figure
-    plt.savefig(savedir)
+    cache = bgrender.get_render_cache()
+    key = bgrender.current_key()
+    if cache is not None and key is not None:
+        # served from the render cache (or stored in)
+        if bgrender.key_missed() or cache.copy(key, dirname, ext, name=file) is None:
+            write_figure(fig, savedir, ext)
+            cache.put(key, savedir)
+        elif verbose:
+            print("(from the render cache)")
+    else:
+        # Actually save the figure
+        write_figure(fig, savedir, ext)
     # Close it
-    if close:
-        plt.close()
+    if close and fig.canvas.manager is not None:
+        plt.close(fig)
     if verbose:
         print("Done")
 
@@ -0,0 +1,791 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 09:12:31 2026.
+
+Rendering helpers for the bloodGases plots.
+
+- content-addressed on-disk render cache (RenderCache, render_key)
+- process-pool batch renderer (render_batch, PLOT_SETS)
+- multi-page pdf and beamer export (export_pdf, export_beamer)
+
+@author: cdesbois
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Iterator
+
+import matplotlib
+from matplotlib import rcParams
+from matplotlib.backends.backend_pdf import PdfPages
+import numpy as np
+import pandas as pd
+
+# bump when the plot functions change (invalidate the cached renders)
+# 2: the gauges are drawn from persistent templates, the saves write the
+#    given figure (no pyplot current figure)
+RENDER_VERSION = 2
+
+# the cache layout: <key[:2]>/<key>.<ext> (key = sha256 hexdigest)
+_PREFIX = re.compile(r"[0-9a-f]{2}")
+_ENTRY = re.compile(r"([0-9a-f]{64})\.(\w+|\w+\.\d+\.\d+\.tmp)")
+
+# measured values describing a gas (cf bgplot.Gas.measured)
+GAS_FIELDS = ("spec", "hb", "fio2", "po2", "ph", "pco2", "hco3", "etco2")
+
+
+def _canonical(value: Any) -> Any:
+    """Return a json serialisable canonical form of a value."""
+    if isinstance(value, (np.generic,)):
+        value = value.item()
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        # 95 and 95.0 are the same measure
+        return float(value).hex()
+    if isinstance(value, dict):
+        return {str(key): _canonical(val) for key, val in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(val) for val in value]
+    return repr(value)
+
+
+def gas_digest(gases: list[Any]) -> str:
+    """
+    Return a canonical hash of the gas values.
+
+    Parameters
+    ----------
+    gases : list
+        list of bg.Gas objects (or any object with the GAS_FIELDS attributes).
+
+    Returns
+    -------
+    str
+        sha256 hexdigest.
+    """
+    values = [
+        [_canonical(getattr(gas, key, None)) for key in GAS_FIELDS] for gas in gases
+    ]
+    return hashlib.sha256(json.dumps(values).encode()).hexdigest()
+
+
+def style_digest() -> str:
+    """Return a hash of the current matplotlib style (rcParams)."""
+    style = repr(sorted((key, repr(val)) for key, val in rcParams.items()))
+    return hashlib.sha256(style.encode()).hexdigest()
+
+
+def render_key(func: str, gases: list[Any], **params: Any) -> str:
+    """
+    Return the cache key of a render.
+
+    Parameters
+    ----------
+    func : str
+        the plot function name.
+    gases : list
+        the gases used by the plot.
+    **params :
+        the plot parameters (num, ident, pcent, ...).
+
+    Returns
+    -------
+    str
+        sha256 hexdigest of (function, parameters, gas values, style, versions)
+    """
+    content = {
+        "func": func,
+        "params": _canonical(params),
+        "gases": gas_digest(gases),
+        "style": style_digest(),
+        "versions": [RENDER_VERSION, matplotlib.__version__, np.__version__],
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+# the key of the render in progress (cf keyed, bgplot.saveGraph)
+_CURRENT_KEY: ContextVar[Optional[str]] = ContextVar("render_key", default=None)
+# True if the caller already looked the key up in the cache (a miss)
+_KEY_MISSED: ContextVar[bool] = ContextVar("render_key_missed", default=False)
+
+
+@contextmanager
+def keyed(key: Optional[str], missed: bool = False) -> Iterator[Optional[str]]:
+    """
+    Set the render key used by the saves in the block (cf bgplot.saveGraph).
+
+    (missed=True : the key was already looked up, the saves only store)
+    """
+    token = _CURRENT_KEY.set(key)
+    missed_token = _KEY_MISSED.set(missed)
+    try:
+        yield key
+    finally:
+        _KEY_MISSED.reset(missed_token)
+        _CURRENT_KEY.reset(token)
+
+
+def current_key() -> Optional[str]:
+    """Return the render key of the active 'keyed' block (None if any)."""
+    return _CURRENT_KEY.get()
+
+
+def key_missed() -> bool:
+    """Return True if the key of the active 'keyed' block is known to be a miss."""
+    return _KEY_MISSED.get()
+
+
+class RenderCache:
+    """
+    Content-addressed on-disk cache of the rendered plots.
+
+    + RenderCache(directory='~/.cache/bloodGasesPlot/renders', max_bytes=256 MiB)
+
+    + attributes :
+        directory : the cache location \
+        max_bytes : size budget (the least recently used renders are removed) \
+    + methods :
+        get : return the cached file (and its metadata) of a key \
+        put : store a rendered file \
+        copy : copy a cached render to a destination \
+        evict : remove the least recently used renders above the budget \
+        clear : remove all the renders \
+        stats : return the counters (hits, misses, stores, evicted, files, bytes) \
+
+    files are stored as <directory>/<key[:2]>/<key>.<ext>, with a <key>.json
+    metadata (the save name), the modification time records the last use.
+    Only the files of this layout are listed, evicted or cleared (the other
+    files of the directory are never touched).
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, max_bytes: int = 256 * 2**20
+    ) -> None:
+        if directory is None:
+            directory = os.path.join("~", ".cache", "bloodGasesPlot", "renders")
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self._counters = dict.fromkeys(["hits", "misses", "stores", "evicted"], 0)
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, key[:2], key + "." + ext.strip("."))
+
+    def get(self, key: str, ext: str = "png") -> Optional[tuple[str, dict[str, Any]]]:
+        """
+        Return the cached render of a key.
+
+        Parameters
+        ----------
+        key : str
+            cf render_key.
+        ext : str, optional (default is "png")
+            the file format.
+
+        Returns
+        -------
+        Optional[tuple[str, dict[str, Any]]]
+            (path, metadata) or None if not cached.
+        """
+        path = self._path(key, ext)
+        meta_path = self._path(key, "json")
+        if not (os.path.exists(path) and os.path.exists(meta_path)):
+            self._counters["misses"] += 1
+            return None
+        with open(meta_path, encoding="utf-8") as file:
+            meta = json.load(file)
+        # record the use (for the eviction)
+        os.utime(path)
+        self._counters["hits"] += 1
+        return path, meta
+
+    def put(self, key: str, source: str, name: Optional[str] = None) -> str:
+        """
+        Store a rendered file.
+
+        Parameters
+        ----------
+        key : str
+            cf render_key.
+        source : str
+            the rendered file (the extension is the format).
+        name : str, optional (default is None)
+            the save name (default the source basename).
+
+        Returns
+        -------
+        str
+            the cached file path.
+        """
+        ext = os.path.splitext(source)[1]
+        path = self._path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # atomic writes (concurrent renders, processes and threads)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, path)
+        meta = {"name": name or os.path.basename(source), "ext": ext.strip(".")}
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        os.replace(tmp, self._path(key, "json"))
+        self._counters["stores"] += 1
+        self.evict()
+        return path
+
+    def copy(
+        self, key: str, dest_dir: str, ext: str = "png", name: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Copy a cached render to a folder.
+
+        Parameters
+        ----------
+        key : str
+            cf render_key.
+        dest_dir : str
+            the destination folder.
+        ext : str, optional (default is "png")
+            the file format.
+        name : str, optional (default is None)
+            the file name (default the save name of the render).
+
+        Returns
+        -------
+        Optional[str]
+            the destination path, None if not cached.
+        """
+        cached = self.get(key, ext)
+        if cached is None:
+            return None
+        path, meta = cached
+        dest_dir = os.path.expanduser(dest_dir) or "."
+        os.makedirs(dest_dir, exist_ok=True)
+        dest = os.path.join(dest_dir, name or meta["name"])
+        shutil.copyfile(path, dest)
+        return dest
+
+    def _entries(self) -> Iterator[tuple[str, str]]:
+        """
+        Yield (folder, name) of the files of the cache layout.
+
+        (<key[:2]>/<key>.<ext>, <key>.json and the temporary files,
+        the other files of the directory are never listed)
+        """
+        if not os.path.isdir(self.directory):
+            return
+        for sub in sorted(os.listdir(self.directory)):
+            folder = os.path.join(self.directory, sub)
+            if not (_PREFIX.fullmatch(sub) and os.path.isdir(folder)):
+                continue
+            for name in os.listdir(folder):
+                match = _ENTRY.fullmatch(name)
+                if match and match.group(1).startswith(sub):
+                    yield folder, name
+
+    def _files(self) -> list[tuple[float, int, str]]:
+        """Return (mtime, size, path) of the cached renders."""
+        files = []
+        for folder, name in self._entries():
+            if name.endswith(".json") or name.endswith(".tmp"):
+                continue
+            path = os.path.join(folder, name)
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def evict(self) -> int:
+        """Remove the least recently used renders above max_bytes, return the count."""
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            meta_path = os.path.splitext(path)[0] + ".json"
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            total -= size
+            removed += 1
+        self._counters["evicted"] += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove all the renders (only the files of the cache layout)."""
+        folders = set()
+        for folder, name in list(self._entries()):
+            os.remove(os.path.join(folder, name))
+            folders.add(folder)
+        for folder in folders:
+            if not os.listdir(folder):
+                os.rmdir(folder)
+
+    def stats(self) -> dict[str, int]:
+        """Return the counters."""
+        files = self._files()
+        stats = dict(self._counters)
+        stats.update(files=len(files), bytes=sum(size for _, size, _ in files))
+        return stats
+
+
+RENDER_CACHE: Optional[RenderCache] = None
+
+
+def use_render_cache(enable: bool = True, **kwargs: Any) -> Optional[RenderCache]:
+    """
+    Enable (or disable) the render cache (bgplot.saveGraph and plot_figs).
+
+    Parameters
+    ----------
+    enable : bool, optional (default is True)
+        True to use the on-disk cache.
+    **kwargs :
+        RenderCache parameters (directory, max_bytes).
+
+    Returns
+    -------
+    Optional[RenderCache]
+        the cache (None if disabled).
+    """
+    global RENDER_CACHE
+    RENDER_CACHE = RenderCache(**kwargs) if enable else None
+    logging.info(f"{RENDER_CACHE=}")
+    return RENDER_CACHE
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """Return the enabled render cache (None if disabled)."""
+    return RENDER_CACHE
+
+
+# --------------------------------------
+# batch rendering (process pool)
+
+# the plot sets of bgmain_manual.plot_figs (bgplot function names)
+PLOT_SETS: dict[str, list[str]] = {
+    "all": [
+        "plot_display",
+        "plot_morpion",
+        "plot_acidbas",
+        "plot_o2",
+        "plot_ventil",
+        "plot_satHb",
+        "plot_cascO2",
+        "plot_hbEffect",
+        "plot_varCaO2",
+        "plot_pieCasc",
+        "plot_cascO2",
+        "plot_cascO2Lin",
+        "plot_GAa",
+        "plot_GAaRatio",
+        "plot_ratio",
+    ],
+    "clin": [
+        "plot_display",
+        "plot_morpion",
+        "plot_acidbas",
+        "plot_o2",
+        "plot_ventil",
+        "plot_satHb",
+        "plot_CaO2",
+        "plot_hbEffect",
+        "plot_varCaO2",
+        "plot_pieCasc",
+        "plot_cascO2Lin",
+        "plot_GAa",
+        "plot_GAaRatio",
+        "plot_ratio",
+    ],
+}
+
+# the gases of the worker process (cf _init_worker)
+_WORKER_GASES: list[Any] = []
+
+
+def plot_jobs(
+    num: int, key: str = "clin", ident: str = ""
+) -> list[tuple[str, Any, dict[str, Any], str]]:
+    """
+    Return the render jobs of a gas (same calls as bgmain_manual.plot_figs).
+
+    Parameters
+    ----------
+    num : int
+        the gas number (0 = ref).
+    key : str, optional (default is "clin")
+        a PLOT_SETS key or a plot function name.
+    ident : str, optional (default is "")
+        prefix of the file names.
+
+    Returns
+    -------
+    list[tuple[str, Any, dict[str, Any], str]]
+        (function name, nums, keywords, file name without extension)
+    """
+    names = PLOT_SETS.get(key, [key])
+    jobs = []
+    for name in dict.fromkeys(names):
+        label = f"{ident}g{num}_{name.split('_')[-1]}"
+        if name == "plot_cascO2Lin":
+            # all until measure
+            jobs.append((name, list(range(num + 1)), {}, label))
+        elif name == "plot_cascO2":
+            # measure + ref
+            jobs.append((name, [0, num], {}, label))
+        elif name == "plot_pieCasc":
+            jobs.append((name, num, {"pcent": True}, label + "Percent"))
+            jobs.append((name, num, {"pcent": False}, label))
+        else:
+            jobs.append((name, num, {}, label))
+    return jobs
+
+
+def _init_worker(gases: list[Any]) -> None:
+    """Initialise a worker process (Agg backend, gases sent once)."""
+    global _WORKER_GASES
+    matplotlib.use("Agg")
+    _WORKER_GASES = gases
+
+
+def _render_job(
+    job: tuple[str, Any, dict[str, Any], str], outdir: str, ext: str, dpi: Any
+) -> dict[str, Any]:
+    """Render one job to outdir, return its manifest row."""
+    # imported here (bgplot imports bgrender)
+    import bgplot
+
+    name, nums, kwds, label = job
+    path = os.path.join(outdir, label + "." + ext)
+    row = {"plot": name, "nums": nums, **kwds, "path": path, "pid": os.getpid()}
+    start = time.perf_counter()
+    try:
+        func = getattr(bgplot, name)
+        fig = func(_WORKER_GASES, nums, outdir, saveit=False, pyplot=False, **kwds)
+        bgplot.write_figure(fig, path, ext, dpi)
+        # bound the worker memory
+        fig.clear()
+        del fig
+        row.update(bytes=os.path.getsize(path), error=None)
+    except Exception as error:  # the other jobs go on
+        logging.warning(f"{name} {nums=} failed: {error!r}")
+        row.update(path=None, bytes=0, error=repr(error))
+    row["seconds"] = time.perf_counter() - start
+    return row
+
+
+def render_batch(
+    gases: list[Any],
+    nums: Optional[list[int]] = None,
+    key: str = "clin",
+    outdir: str = "~/test/batch",
+    ext: str = "png",
+    dpi: Any = "figure",
+    processes: Optional[int] = None,
+    ident: str = "",
+    cache: bool = False,
+) -> pd.DataFrame:
+    """
+    Render the plot set of many gases with a process pool (Agg backend).
+
+    Parameters
+    ----------
+    gases : list
+        list of bg.Gas objects (the reference is gases[0]).
+    nums : list[int], optional (default is None)
+        the gases to plot (default all but the reference).
+    key : str, optional (default is "clin")
+        a PLOT_SETS key ('clin', 'all') or a plot function name.
+    outdir : str, optional (default is "~/test/batch")
+        the destination folder.
+    ext : str, optional (default is "png")
+        the file format.
+    dpi : optional (default is "figure")
+        the resolution (cf Figure.savefig).
+    processes : int, optional (default is None)
+        number of worker processes (default os.cpu_count(), 1 = in process).
+    ident : str, optional (default is "")
+        prefix of the file names.
+    cache : bool, optional (default is False)
+        serve the unchanged plots from the render cache (and store the new ones).
+
+    Returns
+    -------
+    pd.DataFrame
+        the manifest (one row per plot, also saved as outdir/manifest.csv):
+        gas, plot, nums, pcent, path, bytes, seconds, pid, cached, error.
+    """
+    outdir = os.path.expanduser(outdir)
+    os.makedirs(outdir, exist_ok=True)
+    ext = ext.strip(".")
+    if nums is None:
+        nums = list(range(1, len(gases)))
+    render_cache = (get_render_cache() or use_render_cache()) if cache else None
+    rows: list[dict[str, Any]] = []
+    todo: list[tuple[dict[str, Any], tuple[str, Any, dict[str, Any], str]]] = []
+    jobs = [(num, job) for num in nums for job in plot_jobs(num, key, ident)]
+    for order, (num, job) in enumerate(jobs):
+        name, job_nums, kwds, label = job
+        # the manifest keeps the jobs order
+        row = {"order": order, "gas": num, "cached": False, "key": None}
+        if render_cache is not None:
+            used = [gases[i] for i in np.atleast_1d(job_nums)]
+            row["key"] = render_key(name, used, nums=job_nums, ext=ext, dpi=dpi, **kwds)
+            dest = render_cache.copy(row["key"], outdir, ext, name=label + "." + ext)
+            if dest is not None:
+                row.update(
+                    plot=name,
+                    nums=job_nums,
+                    **kwds,
+                    path=dest,
+                    bytes=os.path.getsize(dest),
+                    seconds=0.0,
+                    pid=os.getpid(),
+                    cached=True,
+                    error=None,
+                )
+                rows.append(row)
+                continue
+        todo.append((row, job))
+
+    def collect(row: dict[str, Any], rendered: dict[str, Any]) -> None:
+        row.update(rendered)
+        if render_cache is not None and row["error"] is None:
+            render_cache.put(row["key"], row["path"])
+        rows.append(row)
+
+    start = time.perf_counter()
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or len(todo) < 2:
+        # in process (the Figures are not bound to the pyplot backend)
+        global _WORKER_GASES
+        _WORKER_GASES = gases
+        try:
+            for row, job in todo:
+                collect(row, _render_job(job, outdir, ext, dpi))
+        finally:
+            _WORKER_GASES = []
+    else:
+        with ProcessPoolExecutor(
+            max_workers=processes, initializer=_init_worker, initargs=(gases,)
+        ) as executor:
+            futures = {
+                executor.submit(_render_job, job, outdir, ext, dpi): row
+                for row, job in todo
+            }
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+    elapsed = time.perf_counter() - start
+    logging.info(
+        f"render_batch: {len(todo)} plots rendered ({len(rows) - len(todo)} cached)"
+        f" in {elapsed:.2f}s with {processes} process(es)"
+    )
+    columns = ["gas", "plot", "nums", "pcent", "path", "bytes", "seconds", "pid"]
+    manifest = pd.DataFrame(rows).sort_values("order")
+    manifest = manifest.reindex(columns=columns + ["cached", "error"])
+    manifest = manifest.reset_index(drop=True)
+    manifest.to_csv(os.path.join(outdir, "manifest.csv"), index=False)
+    return manifest
+
+
+# --------------------------------------
+# export (multi-page pdf, beamer)
+
+
+def stamp_figure(fig: Any, name: Optional[str] = None) -> Any:
+    """Add the plot_figs footers ('bgPlot' and the animal name) to a figure."""
+    fig.text(0.99, 0.01, "bgPlot", ha="right", va="bottom", alpha=0.4, size=12)
+    if name is None:
+        name = "cDesbois"
+    fig.text(0.01, 0.01, name, ha="left", va="bottom", alpha=0.4, size=12)
+    return fig
+
+
+def _job_figure(
+    gases: list[Any], job: tuple[str, Any, dict[str, Any], str], name: Optional[str]
+) -> Any:
+    """Return the stamped bare Figure of a job (cf plot_jobs)."""
+    # imported here (bgplot imports bgrender)
+    import bgplot
+
+    func_name, nums, kwds, _ = job
+    func = getattr(bgplot, func_name)
+    fig = func(gases, nums, saveit=False, pyplot=False, **kwds)
+    return stamp_figure(fig, name)
+
+
+def export_pdf(
+    gases: list[Any],
+    filename: str,
+    nums: Optional[list[int]] = None,
+    key: str = "clin",
+    name: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Export the plot set of the gases as a single multi-page pdf.
+
+    The figures are rendered one at a time and cleared as soon as their page
+    is written (the memory does not grow with the number of pages).
+
+    Parameters
+    ----------
+    gases : list
+        list of bg.Gas objects (the reference is gases[0]).
+    filename : str
+        the pdf file.
+    nums : list[int], optional (default is None)
+        the gases to plot (default all but the reference).
+    key : str, optional (default is "clin")
+        a PLOT_SETS key ('clin', 'all') or a plot function name.
+    name : str, optional (default is None)
+        the animal name (footer).
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per page: page, gas, plot, pcent.
+    """
+    filename = os.path.expanduser(filename)
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    if nums is None:
+        nums = list(range(1, len(gases)))
+    rows = []
+    with PdfPages(filename) as pdf:
+        for num in nums:
+            for job in plot_jobs(num, key):
+                fig = _job_figure(gases, job, name)
+                pdf.savefig(fig)
+                fig.clear()
+                del fig
+                rows.append(
+                    {"page": len(rows) + 1, "gas": num, "plot": job[0], **job[2]}
+                )
+    logging.info(f"export_pdf: {len(rows)} pages to {filename}")
+    return pd.DataFrame(rows).reindex(columns=["page", "gas", "plot", "pcent"])
+
+
+def beamer_frames(files: list[str]) -> str:
+    """Return the beamer frames including the files (one plain frame each)."""
+    frames = []
+    for file in files:
+        frames.append(
+            "\\begin{frame}[plain]\n"
+            f"\\includegraphics[width=\\linewidth]{{{file}}}\n"
+            "\\end{frame}\n"
+        )
+    return "\n".join(frames)
+
+
+def export_beamer(
+    gases: list[Any],
+    texname: str,
+    nums: Optional[list[int]] = None,
+    key: str = "clin",
+    folder: str = "fig",
+    ext: str = "pdf",
+    name: Optional[str] = None,
+    standalone: bool = True,
+) -> pd.DataFrame:
+    """
+    Export the plot set of the gases as a beamer .tex and one file per figure.
+
+    A figure file is rebuilt only if its gases (or the plot parameters, the
+    style, ...) changed, cf render_key (the keys are kept in
+    <folder>/render_keys.json).
+
+    Parameters
+    ----------
+    gases : list
+        list of bg.Gas objects (the reference is gases[0]).
+    texname : str
+        the .tex file.
+    nums : list[int], optional (default is None)
+        the gases to plot (default all but the reference).
+    key : str, optional (default is "clin")
+        a PLOT_SETS key ('clin', 'all') or a plot function name.
+    folder : str, optional (default is "fig")
+        the figures folder (relative to the .tex location).
+    ext : str, optional (default is "pdf")
+        the figures format.
+    name : str, optional (default is None)
+        the animal name (footer).
+    standalone : bool, optional (default is True)
+        True for a complete beamer document, False for the frames only (\\input).
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per figure: gas, plot, pcent, file, rebuilt.
+    """
+    # imported here (bgplot imports bgrender)
+    import bgplot
+
+    texname = os.path.expanduser(texname)
+    texdir = os.path.dirname(texname) or "."
+    figdir = os.path.join(texdir, folder)
+    os.makedirs(figdir, exist_ok=True)
+    ext = ext.strip(".")
+    if nums is None:
+        nums = list(range(1, len(gases)))
+    keys_file = os.path.join(figdir, "render_keys.json")
+    keys: dict[str, str] = {}
+    if os.path.exists(keys_file):
+        with open(keys_file, encoding="utf-8") as file:
+            keys = json.load(file)
+    rows = []
+    for num in nums:
+        for job in plot_jobs(num, key):
+            func_name, job_nums, kwds, label = job
+            file = label + "." + ext
+            path = os.path.join(figdir, file)
+            used = [gases[i] for i in np.atleast_1d(job_nums)]
+            job_key = render_key(
+                func_name, used, nums=job_nums, ext=ext, name=name, **kwds
+            )
+            rebuilt = not (os.path.exists(path) and keys.get(file) == job_key)
+            if rebuilt:
+                fig = _job_figure(gases, job, name)
+                bgplot.write_figure(fig, path, ext)
+                fig.clear()
+                del fig
+                keys[file] = job_key
+            rows.append(
+                {
+                    "gas": num,
+                    "plot": func_name,
+                    **kwds,
+                    "file": path,
+                    "rebuilt": rebuilt,
+                }
+            )
+    with open(keys_file, "w", encoding="utf-8") as file:
+        json.dump(keys, file, indent=1)
+    frames = beamer_frames(
+        [os.path.relpath(row["file"], texdir).replace(os.sep, "/") for row in rows]
+    )
+    if standalone:
+        frames = (
+            "\\documentclass{beamer}\n"
+            "\\usepackage{graphicx}\n"
+            "\\begin{document}\n\n" + frames + "\n\\end{document}\n"
+        )
+    with open(texname, "w", encoding="utf-8") as file:
+        file.write(frames)
+    manifest = pd.DataFrame(rows).reindex(
+        columns=["gas", "plot", "pcent", "file", "rebuilt"]
+    )
+    logging.info(
+        f"export_beamer: {texname}, {int(manifest.rebuilt.sum())}/{len(manifest)}"
+        " figures rebuilt"
+    )
+    return manifest
@@ -8,42 +8,110 @@ To load an example file.
 @author: cdesbois
 """
 
-
 import os
+import time
 import logging
-from typing import Any
+import importlib.util
+from typing import Any, Optional
 
+import numpy as np
 import pandas as pd
 
+import bgio
 import bgplot
 
+# the declared dtypes of the known columns (float: cf load_data float_dtype)
+COLUMN_DTYPES: dict[str, Any] = bgio.COLUMN_DTYPES
+
+
+def csv_engine() -> str:
+    """Return the fastest available read_csv engine ('pyarrow' or 'c', opt-in)."""
+    return "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
 
-def load_data(filename: str = None) -> pd.DataFrame:
+
+def convert_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert the decimal comma columns to float (the others are kept as str)."""
+    for col in df.columns:
+        # NB a missing value is converted to 'nan' (str(nan))
+        values = df[col].map(str).str.replace(",", ".", regex=False)
+        try:
+            df[col] = values.astype(float)
+        except ValueError:
+            logging.warning(f"column {col} can not be converted to float")
+            df[col] = values
+    return df
+
+
+@bgio.parse_cached
+def load_data(
+    filename: Optional[str] = None,
+    float_dtype: Any = np.float64,
+    engine: str = "c",
+) -> pd.DataFrame:
     """
     Load an example csv file.
 
+    The decimal commas are parsed while reading, with the COLUMN_DTYPES of the
+    known columns ('spec' as a category), the unknown columns are read as str
+    and converted as before (cf convert_columns: float64 if possible).
+
     Parameters
     ----------
     filename : str, optional (default is None)
         a csv file containing ['spec', 'hb', 'fio2', 'ph', 'pco2', 'hco3'] columns
+    float_dtype : numpy dtype, optional (default is np.float64)
+        dtype of the known numerical columns (np.float32 or np.float64).
+    engine : str, optional (default is "c")
+        the read_csv engine ('c' or 'pyarrow' (cf csv_engine), the unknown
+        columns are read as str by both, ie no date inference).
 
     Returns
     -------
     df : pandas DataFrame
-        the loaded data.
+        the loaded data (df.attrs['parse_time'] is the parsing time (s)).
+
+    NB served from the parsed-file cache if enabled (bgio.use_parse_cache)
 
     """
     if filename is None:
         filename = os.path.join("data", "example.csv")
-    df = pd.read_csv(filename, sep="\t")
-    for col in df.columns:
-        try:
-            df[col] = df[col].astype(str)
-            df[col] = df[col].apply(lambda x: x.replace(",", "."))
-            df[col] = df[col].astype(float)
-        except ValueError:
-            logging.warning(f"column {col} can not be converted to float")
-            df[col] = df[col].astype(str)
+    start = time.perf_counter()
+    header = pd.read_csv(filename, sep="\t", nrows=0).columns
+    dtypes = {
+        col: float_dtype if dtype is float else dtype
+        for col, dtype in COLUMN_DTYPES.items()
+        if col in header
+    }
+    others = [col for col in header if col not in dtypes]
+    options: dict[str, Any] = {}
+    if engine == "c":
+        # same values as float(str)
+        options["float_precision"] = "round_trip"
+    try:
+        df = pd.read_csv(
+            filename,
+            sep="\t",
+            decimal=",",
+            dtype={**dtypes, **dict.fromkeys(others, str)},
+            engine=engine,
+            **options,
+        )
+    except ValueError:
+        # a known column is not numerical
+        logging.warning(f"{filename} can not be parsed with the declared dtypes")
+        df = convert_columns(pd.read_csv(filename, sep="\t", dtype=str))
+        for col, dtype in dtypes.items():
+            if dtype == "category":
+                df[col] = df[col].astype("category")
+    else:
+        for col, dtype in dtypes.items():
+            if dtype == "category" and df[col].isna().any():
+                # the missing values are read as 'nan' (cf convert_columns)
+                df[col] = df[col].astype(object).fillna("nan").astype("category")
+        if others:
+            df[others] = convert_columns(df[others].copy())
+    df.attrs["parse_time"] = time.perf_counter() - start
+    logging.info(f"{filename} parsed in {df.attrs['parse_time']:.3f}s ({engine=})")
     return df
 
 
@@ -63,16 +131,10 @@ def build_gases(df: pd.DataFrame) -> tuple[list[Any], dict[str, Any]]:
 
     """
     # initial values
-    gases, gasesV = [], {}
-    g0 = bgplot.Gas()
-    gases.append(g0)
-    gasesV["g0"] = g0.values()
-
-    for i, row in df.iterrows():
-        dico = row.to_dict()
-        g = bgplot.Gas(**dico)
-        gases.append(g)
-        gasesV["g+i"] = dico
+    gases = [bgplot.Gas()]
+    # bulk build (one pass over the columns, no iterrows)
+    gases.extend(bgplot.Gas.from_frame(df))
+    gasesV = {f"g{i}": gas.visu() for i, gas in enumerate(gases)}
     return gases, gasesV
 
 